@@ -0,0 +1 @@
+from .harness import CASES, BenchmarkSkipped, Options, case, measure, run_cases, write_report, compare_reports
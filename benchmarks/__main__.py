@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import sys
+
+# Benchmarks run headless, PlotFrame draws on its own Tk canvas when a display is available
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from benchmarks.harness import CASES, Options, run_cases, write_report, compare_reports
+import benchmarks.bench_protocol
+import benchmarks.bench_reader
+import benchmarks.bench_event_bus
+import benchmarks.bench_plot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the PyLevit benchmarks.")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON report to this path")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="only run cases whose name contains this text")
+    parser.add_argument("--compare", default=None, help="baseline JSON report to compare against")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer repeats")
+    parser.add_argument("--repeat", type=int, default=None, help="samples per case")
+    parser.add_argument("--min-time", type=float, default=None, help="minimum seconds per sample")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    cases = [case for case in CASES if not args.filter or any(text in case.key for text in args.filter)]
+    if args.list:
+        for case in cases:
+            print(case.key)
+        return
+
+    options = Options(
+        min_time=args.min_time if args.min_time is not None else (0.05 if args.quick else 0.2),
+        repeat=args.repeat if args.repeat is not None else (3 if args.quick else 5),
+        quick=args.quick,
+    )
+    report = run_cases(cases, options)
+
+    if args.output is not None:
+        write_report(report, args.output)
+        print(f"Report written to {args.output}")
+    if args.compare is not None:
+        with open(args.compare, "r") as f:
+            compare_reports(json.load(f), report)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import numpy as np
+from event_bus import EventBus
+from benchmarks.harness import case, measure
+
+TOPIC = "BENCHMARK"
+
+
+@case("event_bus", params=(0, 1, 10, 100))
+def publish(subscribers, options):
+    """Publish to a topic with a number of no-op subscribers."""
+    event_bus = EventBus()
+    callbacks = [lambda event_data=None: None for _ in range(subscribers)]
+    for callback in callbacks:
+        event_bus.subscribe(TOPIC, callback)
+    try:
+        return measure(lambda: event_bus.publish(TOPIC, 1.0), options, items=max(subscribers, 1), unit="deliveries" if subscribers else "publishes")
+    finally:
+        for callback in callbacks:
+            event_bus.unsubscribe(TOPIC, callback)
+
+
+@case("event_bus", params=("batch", "per_event"))
+def publish_many(delivery, options):
+    """Publish 1024 samples at once to a batch subscriber or a per-event subscriber."""
+    event_bus = EventBus()
+    samples = np.arange(1024, dtype=np.float32)
+    callback = lambda event_data=None: None
+    event_bus.subscribe(TOPIC, callback, batch=delivery == "batch")
+    try:
+        return measure(lambda: event_bus.publish_many(TOPIC, samples), options, items=len(samples), unit="samples")
+    finally:
+        event_bus.unsubscribe(TOPIC, callback)
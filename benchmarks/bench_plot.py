@@ -0,0 +1,124 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from sercom.fastprotoc import PacketType
+from sercom.telemetry_ring import TelemetryRing
+from plotting import MinMaxPyramid
+from benchmarks.harness import BenchmarkSkipped, case, measure
+
+HISTORY_SIZES = (10000, 100000, 1000000)
+SAMPLE_RATE = 1000
+SAMPLES_PER_TICK = 40
+WINDOW_SECONDS = 5
+MAX_POINTS = 800
+
+
+class SignalSource:
+    """Synthetic hall and PWM samples at the firmware rate."""
+    def __init__(self):
+        self.sample = 0
+
+    def next(self, count, interleaved=True):
+        """Get the next samples, alternating hall and PWM or hall only."""
+        indices = np.arange(self.sample, self.sample + count)
+        self.sample += count
+        timestamps = indices / SAMPLE_RATE
+        if interleaved:
+            identifiers = np.where(indices % 2 == 0, PacketType.HALL_UPDATE.value, PacketType.PWM_UPDATE.value).astype(np.uint8)
+        else:
+            identifiers = np.full(count, PacketType.HALL_UPDATE.value, dtype=np.uint8)
+        values = np.where(identifiers == PacketType.HALL_UPDATE.value, 250 + 50 * np.sin(timestamps * 5), indices % 256).astype(np.float32)
+        return timestamps, identifiers, values
+
+
+def fill_history(history, pyramid, source, count):
+    for _ in range(0, count, 65536):
+        timestamps, identifiers, values = source.next(min(65536, count - history.head), interleaved=False)
+        start = history.head
+        history.write(timestamps, identifiers, values)
+        pyramid.update(start, len(timestamps))
+
+
+def envelope_tick(history_size, options, full_view):
+    """Append one tick of samples, query the envelope and blit the trace on an Agg canvas."""
+    history = TelemetryRing(history_size)
+    pyramid = MinMaxPyramid(history)
+    source = SignalSource()
+    fill_history(history, pyramid, source, history_size)
+
+    figure = Figure(figsize=(9, 9))
+    canvas = FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    line, = axes.plot([], [], lw=2, animated=True)
+    axes.set_ylim(-45, 545)
+    canvas.draw()
+    background = canvas.copy_from_bbox(figure.bbox)
+
+    def run():
+        timestamps, identifiers, values = source.next(SAMPLES_PER_TICK, interleaved=False)
+        start = history.head
+        history.write(timestamps, identifiers, values)
+        pyramid.update(start, len(timestamps))
+
+        x_max = timestamps[-1]
+        x_min = history.latest()[0][0] if full_view else x_max - WINDOW_SECONDS
+        x, y, _ = pyramid.query(x_min, x_max, MAX_POINTS)
+        axes.set_xlim(x_min, x_max)
+        line.set_data(x, y)
+        canvas.restore_region(background)
+        axes.draw_artist(line)
+    return measure(run, options, items=SAMPLES_PER_TICK, unit="samples")
+
+
+@case("plot", params=HISTORY_SIZES)
+def envelope_live_view(history_size, options):
+    return envelope_tick(history_size, options, full_view=False)
+
+
+@case("plot", params=HISTORY_SIZES)
+def envelope_full_view(history_size, options):
+    return envelope_tick(history_size, options, full_view=True)
+
+
+@case("plot", params=HISTORY_SIZES)
+def plot_frame_tick(history_size, options):
+    """A complete PlotFrame render tick with `history_size` samples per trace, needs a display for Tk."""
+    import tkinter
+    import customtkinter
+    import sercom
+    from event_bus import EventBus
+    from frames.plot_frame import PlotFrame
+
+    try:
+        root = customtkinter.CTk()
+    except tkinter.TclError as e:
+        raise BenchmarkSkipped(f"Tk is not available: {e}")
+
+    frame = PlotFrame(root)
+    frame.init_plot()
+    event_bus = EventBus()
+    subscriptions = dict(event_bus.subscribers)
+    try:
+        if frame.history_points < history_size:
+            raise BenchmarkSkipped(f"plot.history_points is smaller than {history_size}")
+
+        root.update()
+        source = SignalSource()
+        while frame.hall_history.head < history_size:
+            frame.telemetry.write(*source.next(32768))
+            frame.read_telemetry()
+        frame.full_redraw()
+        root.update()
+
+        def run():
+            frame.telemetry.write(*source.next(SAMPLES_PER_TICK))
+            frame.render_tick()
+        return measure(run, options, items=SAMPLES_PER_TICK, unit="samples")
+    finally:
+        frame.window_close_callback()
+        for topic, topic_subscriptions in subscriptions.items():
+            for subscription in topic_subscriptions:
+                if getattr(subscription.callback, "__self__", None) is frame:
+                    event_bus.unsubscribe(topic, subscription.callback)
+        sercom.Sercom().telemetry_rings[:] = [entry for entry in sercom.Sercom().telemetry_rings if entry[0] is not frame.telemetry]
+        root.destroy()
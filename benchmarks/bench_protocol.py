@@ -0,0 +1,73 @@
+import io
+import numpy as np
+import sercom.fastprotoc as pkt
+from sercom.fastprotoc import PacketType
+from sercom.parser import StreamParser
+from benchmarks.harness import case, measure
+
+
+def make_stream(count, corruption=0.0, seed=0):
+    """Encode alternating HALL/PWM frames, overwriting one byte in a fraction of them."""
+    rng = np.random.default_rng(seed)
+    identifiers = np.where(np.arange(count) % 2 == 0, PacketType.HALL_UPDATE.value, PacketType.PWM_UPDATE.value).astype(np.uint8)
+    values = rng.uniform(0, 500, count).astype(np.float32)
+    raw = pkt.encode_many(identifiers, values).view(np.uint8)
+    if corruption:
+        corrupted = np.flatnonzero(rng.random(count) < corruption)
+        raw[corrupted * pkt.PACKET_SIZE + rng.integers(0, pkt.PACKET_SIZE, len(corrupted))] = rng.integers(0, 256, len(corrupted), dtype=np.uint8)
+    return identifiers, values, raw.tobytes()
+
+
+@case("protocol")
+def encode_send(options):
+    identifiers, values, _ = make_stream(1000)
+    frames = list(zip(identifiers.tolist(), values.tolist()))
+    sink = io.BytesIO()
+
+    def run():
+        sink.seek(0)
+        for identifier, value in frames:
+            pkt.send(sink, identifier, value)
+    return measure(run, options, items=len(frames), unit="frames")
+
+
+@case("protocol")
+def encode_many(options):
+    identifiers, values, _ = make_stream(8192)
+    return measure(lambda: pkt.encode_many(identifiers, values).tobytes(), options, items=len(identifiers), unit="frames")
+
+
+@case("protocol")
+def decode_packet(options):
+    _, _, data = make_stream(1000)
+    packets = [data[offset:offset + pkt.PACKET_SIZE] for offset in range(0, len(data), pkt.PACKET_SIZE)]
+
+    def run():
+        for packet in packets:
+            pkt.decode_packet(packet)
+    return measure(run, options, items=len(packets), unit="frames")
+
+
+@case("protocol", params=(64, 4096, 65536))
+def decode_many(chunk_bytes, options):
+    _, _, data = make_stream(chunk_bytes // pkt.PACKET_SIZE)
+    return measure(lambda: pkt.decode_many(data), options, items=len(data) // pkt.PACKET_SIZE, unit="frames")
+
+
+@case("protocol", params=(0.0, 0.001, 0.01, 0.1))
+def parser_resync(corruption, options):
+    """Stream 4 KiB reads through the parser, corrupted frames force resynchronisation."""
+    count = 16384 if options.quick else 131072
+    _, _, data = make_stream(count, corruption)
+    view = memoryview(data)
+    parser = StreamParser()
+
+    def run():
+        parser.reset()
+        for offset in range(0, len(view), 4096):
+            parser.feed(view[offset:offset + 4096])
+            parser.parse()
+    result = measure(run, options, items=len(data), unit="bytes")
+    result["frames_decoded"] = parser.total_good
+    result["rejects"] = parser.total_bad
+    return result
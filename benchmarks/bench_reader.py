@@ -0,0 +1,144 @@
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import numpy as np
+import sercom.fastprotoc as pkt
+from sercom.fastprotoc import PacketType
+from sercom.multiplexer import MultiplexedHandler, SerialMultiplexer
+from sercom.replay import ReplaySerial, write_raw_capture
+from sercom.serial_thread import SerialReaderThread
+from sercom.setter_table import SetterTable
+from sercom.telemetry_ring import TelemetryRing
+from sercom.transport import SerialProtocol, SerialTransport
+from benchmarks.harness import BenchmarkSkipped, case, summarize
+from benchmarks.bench_protocol import make_stream
+
+TELEMETRY = np.array([PacketType.HALL_UPDATE.value, PacketType.PWM_UPDATE.value], dtype=np.uint8)
+TIMEOUT = 60
+
+
+def write_capture(directory, count):
+    """Write a raw capture of `count` telemetry frames in serial-sized chunks."""
+    _, _, data = make_stream(count)
+    path = os.path.join(directory, "reader.raw")
+    write_raw_capture(path, [(0.0, data[offset:offset + 4096]) for offset in range(0, len(data), 4096)])
+    return path
+
+
+def create_reader_args(serial, count):
+    ring = TelemetryRing(count)
+    return ring, (serial, SetterTable((PacketType.SETPOINT_UPDATE.value,)), [(ring, TELEMETRY)])
+
+
+def wait_until_read(ring, count):
+    deadline = time.monotonic() + TIMEOUT
+    while ring.head < count:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Reader only received {ring.head} of {count} frames")
+        time.sleep(0.0005)
+
+
+def read_with_thread(path, count, event_driven):
+    serial = ReplaySerial(path, speed=0)
+    ring, args = create_reader_args(serial, count)
+    reader = SerialReaderThread(*args)
+    if event_driven and not reader.event_driven:
+        reader.close_wakeup_pipe()
+        serial.close()
+        raise BenchmarkSkipped("the select reader is disabled in the config")
+    # The reader mode is normally taken from the config, polling works on any port
+    reader.event_driven = event_driven
+
+    started = time.perf_counter()
+    reader.start()
+    try:
+        wait_until_read(ring, count)
+        return time.perf_counter() - started
+    finally:
+        reader.stop()
+        reader.join()
+        serial.close()
+
+
+def read_with_transport(path, count):
+    loop = asyncio.new_event_loop()
+    serial = ReplaySerial(path, speed=0)
+    ring, args = create_reader_args(serial, count)
+    transport = SerialTransport(loop, serial, SerialProtocol(*args))
+
+    async def wait():
+        started = time.perf_counter()
+        transport.start()
+        deadline = time.monotonic() + TIMEOUT
+        while ring.head < count:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Reader only received {ring.head} of {count} frames")
+            await asyncio.sleep(0.0005)
+        return time.perf_counter() - started
+
+    try:
+        return loop.run_until_complete(wait())
+    finally:
+        transport.close()
+        serial.close()
+        loop.close()
+
+
+def read_multiplexed(path, count, devices):
+    """Replay the capture on `devices` ports serviced by one multiplexer thread."""
+    multiplexer = SerialMultiplexer()
+    ports = [ReplaySerial(path, speed=0) for _ in range(devices)]
+    handlers = []
+    rings = []
+    for index, serial in enumerate(ports):
+        ring, args = create_reader_args(serial, count)
+        handlers.append(MultiplexedHandler(*args, namespace=f"benchmark{index}"))
+        rings.append(ring)
+
+    started = time.perf_counter()
+    for handler in handlers:
+        multiplexer.add(handler)
+    try:
+        for ring in rings:
+            wait_until_read(ring, count)
+        return time.perf_counter() - started
+    finally:
+        for handler in handlers:
+            multiplexer.remove(handler)
+        multiplexer.stop()
+        multiplexer.join()
+        for serial in ports:
+            serial.close()
+
+
+@case("reader", params=("select", "poll", "asyncio"))
+def replay_frames(mode, options):
+    """Frames per second from a maximum-speed replay into a telemetry ring."""
+    if os.name == "nt":
+        raise BenchmarkSkipped("replay needs pipes with FIONREAD")
+
+    count = 50000 if options.quick else 400000
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_capture(directory, count)
+        timings = []
+        for _ in range(max(options.repeat // 2, 1)):
+            if mode == "asyncio":
+                timings.append(read_with_transport(path, count))
+            else:
+                timings.append(read_with_thread(path, count, mode == "select"))
+    return summarize(timings, count, "frames", bytes_per_second=count * pkt.PACKET_SIZE / statistics.median(timings))
+
+
+@case("reader", params=(1, 4, 8))
+def multiplexed_frames(devices, options):
+    """Total frames per second of several devices replayed at maximum speed into one multiplexer thread."""
+    if os.name == "nt":
+        raise BenchmarkSkipped("replay needs pipes with FIONREAD")
+
+    count = (50000 if options.quick else 400000) // devices
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_capture(directory, count)
+        timings = [read_multiplexed(path, count, devices) for _ in range(max(options.repeat // 2, 1))]
+    return summarize(timings, count * devices, "frames", bytes_per_second=count * devices * pkt.PACKET_SIZE / statistics.median(timings))
@@ -0,0 +1,164 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+CASES = []
+
+
+class BenchmarkSkipped(Exception):
+    """Raised by a case that cannot run in the current environment."""
+
+
+class Case:
+    """A registered benchmark case, called once per parameter."""
+    def __init__(self, group, name, func, param):
+        self.group = group
+        self.name = name
+        self.func = func
+        self.param = param
+
+    @property
+    def key(self):
+        return f"{self.group}.{self.name}" + (f"[{self.param}]" if self.param is not None else "")
+
+    def run(self, options):
+        return self.func(self.param, options) if self.param is not None else self.func(options)
+
+
+def case(group, params=None):
+    """Register a benchmark function, once for every parameter if any are given."""
+    def decorator(func):
+        for param in params or (None,):
+            CASES.append(Case(group, func.__name__, func, param))
+        return func
+    return decorator
+
+
+class Options:
+    """Run settings shared by all cases."""
+    def __init__(self, min_time=0.2, repeat=5, quick=False):
+        self.min_time = min_time
+        self.repeat = repeat
+        self.quick = quick
+
+
+def summarize(timings, items, unit, **extra):
+    """Summarize per-call timings into a result entry."""
+    median = statistics.median(timings)
+    result = {
+        "unit": unit,
+        "items_per_call": items,
+        "seconds_per_call": {
+            "min": min(timings),
+            "median": median,
+            "mean": statistics.fmean(timings),
+            "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        },
+        "items_per_second": items / median if median > 0 else float("inf"),
+        "samples": len(timings),
+    }
+    result.update(extra)
+    return result
+
+
+def measure(run, options, items=1, unit="ops", **extra):
+    """Time a callable, calling it often enough per repeat to exceed the minimum time."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= options.min_time / 10 or number >= 1 << 20:
+            break
+        number *= 10
+    number = max(int(number * options.min_time / max(elapsed, 1e-9)), 1)
+
+    timings = []
+    for _ in range(options.repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        timings.append((time.perf_counter() - started) / number)
+    return summarize(timings, items, unit, calls_per_sample=number, **extra)
+
+
+def get_commit():
+    """Get the current commit and whether the tree has local changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def get_metadata(options):
+    """Describe the environment so reports from different machines are not mixed up."""
+    import numpy
+    import matplotlib
+
+    commit, dirty = get_commit()
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": numpy.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "min_time": options.min_time,
+        "repeat": options.repeat,
+        "quick": options.quick,
+    }
+
+
+def run_cases(cases, options, stream=sys.stdout):
+    """Run the cases and collect a report."""
+    report = {"metadata": get_metadata(options), "results": {}, "skipped": {}}
+    for benchmark in cases:
+        try:
+            result = benchmark.run(options)
+        except BenchmarkSkipped as e:
+            report["skipped"][benchmark.key] = str(e)
+            print(f"{benchmark.key:<48} skipped: {e}", file=stream)
+            continue
+        report["results"][benchmark.key] = result
+        print(f"{benchmark.key:<48} {format_seconds(result['seconds_per_call']['median']):>10}/call {result['items_per_second']:>14,.0f} {result['unit']}/s", file=stream)
+    return report
+
+
+def format_seconds(seconds):
+    """Format a duration with a readable unit."""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def write_report(report, path):
+    """Write a report as JSON."""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=4)
+
+
+def compare_reports(baseline, report, stream=sys.stdout):
+    """Print the throughput change of every case against a baseline report."""
+    print(f"\nCompared to {baseline['metadata'].get('commit') or 'baseline'}:", file=stream)
+    for key, result in report["results"].items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            continue
+        ratio = result["items_per_second"] / previous["items_per_second"]
+        print(f"{key:<48} {ratio:>6.2f}x {'faster' if ratio >= 1 else 'slower'}", file=stream)
@@ -1,55 +1,222 @@
 import pickle
 import os
 import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+SET = "set"
+DELETE = "del"
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on a file, shared by all processes using the cache."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
 
 
 class PersistentCache:
+    """Key-value cache kept in memory and persisted as an append-only log.
+
+    Every change is appended to the log under a file lock and other processes
+    replay the records they have not seen yet, so the cache can be shared.
+    The log is compacted once it holds mostly superseded records. Entries can
+    expire after a time to live and the least recently used entries are
+    evicted beyond `max_entries`.
+    """
     _instance = None
-    _lock = threading.Lock()
+    _lock = threading.RLock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.cache_file = "cache.pkl"
+            cls._instance.cache_file = "cache.log"
+            cls._instance.legacy_file = "cache.pkl"
+            cls._instance.max_entries = 1024
+            cls._instance.default_ttl = None
+            cls._instance.refresh_interval = 1.0
+            cls._instance.entries = OrderedDict()
+            cls._instance.records = 0
+            cls._instance.offset = 0
+            cls._instance.identity = None
+            cls._instance.last_refreshed = None
         return cls._instance
 
     @classmethod
-    def _get_cache_file_path(cls):
+    def _get_cache_dir(cls):
         cache_dir = os.path.join(os.getcwd(), "tmp")
         if not os.path.exists(cache_dir):
             os.makedirs(cache_dir)
-        return os.path.join(cache_dir, cls._instance.cache_file)
+        return cache_dir
+
+    @classmethod
+    def _get_cache_file_path(cls):
+        return os.path.join(cls._get_cache_dir(), cls._instance.cache_file)
+
+    @classmethod
+    def _get_lock_file_path(cls):
+        return os.path.join(cls._get_cache_dir(), cls._instance.cache_file + ".lock")
 
-    def get(self, key):
+    def get(self, key, default=None):
         """Get a specific cache entry."""
         try:
-            cache_data = {}
-            cache_file_path = self._get_cache_file_path()
-            if os.path.exists(cache_file_path):
-                with open(cache_file_path, "rb") as f:
-                    cache_data = pickle.load(f)
-            return cache_data.get(key)
-        except FileNotFoundError:
-            print("Cache file not found.")
-            return None
-        except (pickle.UnpicklingError, EOFError):
-            print("Invalid pickle format in Cache file.")
-            return None
+            with self._lock:
+                if self.last_refreshed is None or time.monotonic() - self.last_refreshed >= self.refresh_interval:
+                    self.refresh()
+
+                entry = self.entries.get(key)
+                if entry is None:
+                    return default
+                value, expires = entry
+                if expires is not None and expires <= time.time():
+                    del self.entries[key]
+                    return default
+                self.entries.move_to_end(key)
+                return value
         except Exception as e:
             print(f"Error reading Cache file: {e}")
-            return None
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Set a specific cache entry, optionally expiring after `ttl` seconds."""
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl is not None else None
+        self._write([(SET, key, value, expires)])
 
-    def set(self, key, value):
-        """Set a specific cache entry."""
+    def delete(self, key):
+        """Remove a cache entry."""
+        self._write([(DELETE, key, None, None)])
+
+    def refresh(self):
+        """Replay the records other processes appended since the last refresh."""
+        with self._lock:
+            with file_lock(self._get_lock_file_path()):
+                self._catch_up()
+
+    def compact(self):
+        """Rewrite the log with only the live entries."""
+        with self._lock:
+            with file_lock(self._get_lock_file_path()):
+                self._catch_up()
+                self._compact()
+
+    def _write(self, records):
         try:
             with self._lock:
-                cache_data = {}
-                cache_file_path = self._get_cache_file_path()
-                if os.path.exists(cache_file_path):
-                    with open(cache_file_path, "rb") as f:
-                        cache_data = pickle.load(f)
-                cache_data[key] = value
-                with open(cache_file_path, "wb") as f:
-                    pickle.dump(cache_data, f)
+                with file_lock(self._get_lock_file_path()):
+                    self._catch_up()
+                    for record in records:
+                        self._apply(record)
+                    records += self._evict()
+
+                    path = self._get_cache_file_path()
+                    with open(path, "ab") as f:
+                        for record in records:
+                            pickle.dump(record, f)
+                        self.offset = f.tell()
+                    self.records += len(records)
+
+                    if self.records > 64 and self.records > 4 * len(self.entries):
+                        self._compact()
         except Exception as e:
             print(f"Error updating Cache file: {e}")
+
+    def _apply(self, record):
+        operation, key, value, expires = record
+        if operation == SET and (expires is None or expires > time.time()):
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+        else:
+            self.entries.pop(key, None)
+
+    def _evict(self):
+        """Drop the least recently used entries beyond the size bound."""
+        evicted = []
+        while len(self.entries) > self.max_entries:
+            key, _ = self.entries.popitem(last=False)
+            evicted.append((DELETE, key, None, None))
+        return evicted
+
+    def _catch_up(self):
+        """Read new log records, the file lock must be held."""
+        path = self._get_cache_file_path()
+        self.last_refreshed = time.monotonic()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._migrate_legacy()
+            return
+
+        identity = (stat.st_dev, stat.st_ino)
+        if identity != self.identity or stat.st_size < self.offset:
+            # The log has been compacted by another process, read it from the start
+            self.entries.clear()
+            self.records = 0
+            self.offset = 0
+            self.identity = identity
+        if stat.st_size == self.offset:
+            return
+
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            while self.offset < stat.st_size:
+                try:
+                    record = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+                    # A writer was interrupted, drop the torn tail so new records stay readable
+                    print("Invalid record in Cache file, truncating.")
+                    with open(path, "r+b") as tail:
+                        tail.truncate(self.offset)
+                    break
+                self._apply(record)
+                self.records += 1
+                self.offset = f.tell()
+
+    def _compact(self):
+        """Replace the log by a snapshot of the live entries, the file lock must be held."""
+        path = self._get_cache_file_path()
+        temp_path = path + ".tmp"
+        now = time.time()
+        with open(temp_path, "wb") as f:
+            for key, (value, expires) in self.entries.items():
+                if expires is None or expires > now:
+                    pickle.dump((SET, key, value, expires), f)
+            self.offset = f.tell()
+        os.replace(temp_path, path)
+        stat = os.stat(path)
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.records = len(self.entries)
+
+    def _migrate_legacy(self):
+        """Import the entries of the former pickle cache file."""
+        legacy_path = os.path.join(self._get_cache_dir(), self.legacy_file)
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, "rb") as f:
+                legacy_data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        for key, value in legacy_data.items():
+            self._apply((SET, key, value, None))
+        self._compact()
+        os.remove(legacy_path)
@@ -1,4 +1,11 @@
+import atexit
+import copy
 import json
+import os
+import tempfile
+import threading
+import time
+from event_bus import EventBus, Event
 
 
 class Config:
@@ -9,6 +16,17 @@ class Config:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance.config_file = "config.json"
+            cls._instance.flush_delay = 0.5
+            cls._instance.reload_interval = 1.0
+            cls._instance.data = None
+            cls._instance.mtime = None
+            cls._instance.last_checked = 0.0
+            cls._instance.dirty = {}
+            cls._instance.flush_due = None
+            cls._instance.writer = None
+            cls._instance._lock = threading.RLock()
+            cls._instance._changed = threading.Condition(cls._instance._lock)
+            atexit.register(cls._instance.flush)
         return cls._instance
 
     def _load_config(self):
@@ -25,27 +43,137 @@ class Config:
         return {}
 
     def _save_config(self, config_data):
-        """Save configuration data to the config file."""
+        """Save configuration data atomically, readers never see a partial file."""
+        directory = os.path.dirname(os.path.abspath(self.config_file))
         try:
-            with open(self.config_file, "w") as f:
-                json.dump(config_data, f, indent=4)
+            fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(config_data, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.config_file)
+            except BaseException:
+                os.remove(temp_path)
+                raise
         except PermissionError:
             print("Permission denied. Cannot write to config file.")
         except Exception as e:
             print(f"Error writing to config file: {e}")
 
+    def _get_mtime(self):
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _ensure_loaded(self):
+        """Load the file on first use and pick up external changes at most once per reload interval."""
+        if self.data is None:
+            with self._lock:
+                if self.data is None:
+                    self.mtime = self._get_mtime()
+                    self.data = self._load_config()
+                    self.last_checked = time.monotonic()
+        elif time.monotonic() - self.last_checked >= self.reload_interval:
+            self.reload()
+
     def get(self, *keys):
         """Get a specific configuration setting."""
-        config_data = self._load_config()
+        self._ensure_loaded()
+        config_data = self.data
         for key in keys:
-            config_data = config_data.get(key, {})
-        return config_data
+            config_data = config_data.get(key, {}) if isinstance(config_data, dict) else {}
+        # Callers may modify what they get, the shared state must not change with it
+        return copy.deepcopy(config_data) if isinstance(config_data, (dict, list)) else config_data
 
     def set(self, *keys, value):
-        """Set a specific configuration setting."""
-        config_data = self._load_config()
-        nested_dict = config_data
-        for key in keys[:-1]:
-            nested_dict = nested_dict.setdefault(key, {})
-        nested_dict[keys[-1]] = value
-        self._save_config(config_data)
+        """Set a specific configuration setting, the file is written shortly after.
+
+        CONFIG_CHANGED is only published for edits to the file, the caller
+        applies its own changes.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if _lookup(self.data, keys) == value:
+                return
+            _assign(self.data, keys, copy.deepcopy(value))
+            self.dirty[keys] = copy.deepcopy(value)
+            self.flush_due = time.monotonic() + self.flush_delay
+            self._start_writer()
+            self._changed.notify()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self._lock:
+            if not self.dirty:
+                return
+            # Keep changes other processes made to the file since it was loaded
+            config_data = self._load_config() if self._get_mtime() != self.mtime else self.data
+            for keys, value in self.dirty.items():
+                _assign(config_data, keys, value)
+            self._save_config(config_data)
+            self.data = config_data
+            self.mtime = self._get_mtime()
+            self.dirty = {}
+            self.flush_due = None
+
+    def reload(self):
+        """Reload the file if it changed on disk and notify subscribers of the changed keys."""
+        with self._lock:
+            self.last_checked = time.monotonic()
+            mtime = self._get_mtime()
+            if mtime == self.mtime or mtime is None:
+                return
+            config_data = self._load_config()
+            for keys, value in self.dirty.items():
+                _assign(config_data, keys, value)
+            changed = _diff(self.data or {}, config_data)
+            self.data = config_data
+            self.mtime = mtime
+        if changed:
+            EventBus().publish(Event.CONFIG_CHANGED.value, changed)
+
+    def _start_writer(self):
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._run_writer, name="config-writer", daemon=True)
+            self.writer.start()
+
+    def _run_writer(self):
+        """Flush once no change has been made for the flush delay."""
+        with self._lock:
+            while True:
+                if self.flush_due is None:
+                    self._changed.wait()
+                    continue
+                remaining = self.flush_due - time.monotonic()
+                if remaining > 0:
+                    self._changed.wait(remaining)
+                    continue
+                self.flush()
+
+
+def _lookup(config_data, keys):
+    for key in keys:
+        if not isinstance(config_data, dict) or key not in config_data:
+            return None
+        config_data = config_data[key]
+    return config_data
+
+
+def _assign(config_data, keys, value):
+    for key in keys[:-1]:
+        config_data = config_data.setdefault(key, {})
+    config_data[keys[-1]] = value
+
+
+def _diff(old, new, prefix=()):
+    """Get the key paths whose values differ between two config trees."""
+    changed = []
+    for key in old.keys() | new.keys():
+        old_value, new_value = old.get(key), new.get(key)
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changed.extend(_diff(old_value, new_value, prefix + (key,)))
+        elif old_value != new_value:
+            changed.append(prefix + (key,))
+    return changed
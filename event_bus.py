@@ -1,3 +1,6 @@
+import itertools
+import threading
+from collections import deque
 from enum import Enum
 
 
@@ -5,6 +8,95 @@ class Event(Enum):
     SERIAL_OPENED = 50
     SERIAL_CLOSED = 51
     LOGGER_EVENT = 52
+    CONFIG_CHANGED = 53
+    PORTS_CHANGED = 54
+
+
+def namespaced(namespace, topic):
+    """Get the topic of a device session, the default session (None) uses the plain topic."""
+    return topic if namespace is None else (namespace, topic)
+
+
+class Affinity(Enum):
+    DIRECT = 0  # Called on the publishing thread
+    UI = 1  # Called on the Tk main loop by the UI pump
+    BACKGROUND = 2  # Called on the event bus dispatcher thread
+
+
+class Policy(Enum):
+    COALESCE = 0  # Only the latest pending event is kept
+    DROP_OLDEST = 1  # Up to max_pending events are kept, the oldest is dropped first
+
+
+class Subscription:
+    """A subscriber callback with its delivery settings."""
+    def __init__(self, event_type, callback, affinity, policy, max_pending, batch):
+        self.event_type = event_type
+        self.callback = callback
+        self.affinity = affinity
+        self.policy = policy
+        self.max_pending = max_pending
+        self.batch = batch
+        self.active = True
+        self.dropped = 0
+        self.pending = deque()
+
+
+class DeliveryQueue:
+    """Events waiting for queued subscribers, delivered in the order they were published."""
+    def __init__(self):
+        self.entries = {}
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def put(self, subscription, event_data):
+        """Queue an event for a subscriber according to its policy."""
+        with self.lock:
+            if subscription.policy is Policy.COALESCE:
+                # Re-insert so the latest event keeps its place in the overall order
+                if self.entries.pop(subscription, self) is not self:
+                    subscription.dropped += 1
+                self.entries[subscription] = event_data
+            else:
+                if len(subscription.pending) >= subscription.max_pending:
+                    del self.entries[subscription.pending.popleft()]
+                    subscription.dropped += 1
+                key = (subscription, next(self.sequence))
+                subscription.pending.append(key)
+                self.entries[key] = event_data
+        self.ready.set()
+
+    def put_many(self, subscription, events):
+        """Queue a batch of events for a DROP_OLDEST subscriber."""
+        # Events that would be dropped immediately are not queued at all
+        skipped = max(len(events) - subscription.max_pending, 0)
+        with self.lock:
+            subscription.dropped += skipped
+        for event_data in events[skipped:]:
+            self.put(subscription, event_data)
+
+    def discard(self, subscription):
+        """Drop the events queued for a subscriber."""
+        with self.lock:
+            self.entries.pop(subscription, None)
+            while subscription.pending:
+                self.entries.pop(subscription.pending.popleft(), None)
+
+    def take(self):
+        """Remove and return all queued (subscription, event data) pairs in order."""
+        with self.lock:
+            entries, self.entries = self.entries, {}
+            self.ready.clear()
+            taken = []
+            for key, event_data in entries.items():
+                subscription = key if isinstance(key, Subscription) else key[0]
+                subscription.pending.clear()
+                taken.append((subscription, event_data))
+        return taken
+
+    def __len__(self):
+        return len(self.entries)
 
 
 class EventBus:
@@ -14,24 +106,176 @@ class EventBus:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance.subscribers = {}
+            cls._instance.tables = {}
+            cls._instance.lock = threading.Lock()
+            cls._instance.ui_queue = DeliveryQueue()
+            cls._instance.ui_widget = None
+            cls._instance.ui_thread = None
+            cls._instance.ui_interval = 50
+            cls._instance.ui_after_id = None
+            cls._instance.background_queue = DeliveryQueue()
+            cls._instance.background_thread = None
         return cls._instance
-    
-    def subscribe(self, event_type, callback):
-        """Subscribe to an event."""
-        if event_type not in self.subscribers:
-            self.subscribers[event_type] = []
-        self.subscribers[event_type].append(callback)
+
+    def subscribe(self, event_type, callback, affinity=Affinity.DIRECT, policy=None, max_pending=1024, batch=False):
+        """Subscribe to an event.
+
+        UI callbacks are always called on the Tk main loop, BACKGROUND callbacks
+        on the dispatcher thread. Queued subscribers coalesce to the latest event
+        by default (UI) or keep up to `max_pending` events (BACKGROUND). Batch
+        subscribers receive the whole array passed to publish_many.
+        """
+        if policy is None:
+            policy = Policy.DROP_OLDEST if affinity is Affinity.BACKGROUND else Policy.COALESCE
+        subscription = Subscription(event_type, callback, affinity, policy, max_pending, batch)
+        with self.lock:
+            self.subscribers[event_type] = self.subscribers.get(event_type, ()) + (subscription,)
+            self.compile(event_type)
+        if affinity is Affinity.BACKGROUND:
+            self.start_background()
+        return subscription
 
     def unsubscribe(self, event_type, callback):
-        """Unsubscribe from an event."""
-        if event_type in self.subscribers:
-            self.subscribers[event_type].remove(callback)
+        """Unsubscribe from an event, safe while the event is being dispatched."""
+        with self.lock:
+            subscriptions = self.subscribers.get(event_type, ())
+            for subscription in subscriptions:
+                if subscription.callback == callback:
+                    subscription.active = False
+            self.subscribers[event_type] = tuple(s for s in subscriptions if s.active)
+            self.compile(event_type)
+
+    def compile(self, event_type):
+        """Precompute the immutable dispatch table of an event type."""
+        subscriptions = self.subscribers.get(event_type, ())
+        if not subscriptions:
+            self.subscribers.pop(event_type, None)
+            self.tables.pop(event_type, None)
+            return
+
+        direct = tuple(s.callback for s in subscriptions if s.affinity is Affinity.DIRECT and not s.batch)
+        direct_batch = tuple(s.callback for s in subscriptions if s.affinity is Affinity.DIRECT and s.batch)
+        queued = tuple(s for s in subscriptions if s.affinity is not Affinity.DIRECT)
+        self.tables[event_type] = (direct + direct_batch, direct, direct_batch, queued)
 
     def publish(self, event_type, event_data=None):
-        """Publish an event."""
-        if event_type in self.subscribers:
-            for callback in self.subscribers[event_type]:
-                try:
-                    callback(event_data) if event_data is not None else callback()
-                except Exception as e:
-                    print(f"Error occurred while executing callback for {event_type}: {e}")
+        """Publish an event.
+
+        Direct subscribers are called immediately. UI subscribers are called
+        immediately when publishing from the Tk thread, other queued subscribers
+        receive the event through their delivery queue.
+        """
+        table = self.tables.get(event_type)
+        if table is None:
+            return
+
+        callbacks, _, _, queued = table
+        args = () if event_data is None else (event_data,)
+        for callback in callbacks:
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error occurred while executing callback for {event_type}: {e}")
+        for subscription in queued:
+            self.enqueue(subscription, event_data)
+
+    def publish_many(self, event_type, events):
+        """Publish a batch of events of the same type, typically an array of samples.
+
+        Batch subscribers receive the whole batch at once, other subscribers
+        receive the events one by one, or only the latest one if they coalesce.
+        """
+        table = self.tables.get(event_type)
+        if table is None or len(events) == 0:
+            return
+
+        _, direct, direct_batch, queued = table
+        for callback in direct_batch:
+            try:
+                callback(events)
+            except Exception as e:
+                print(f"Error occurred while executing callback for {event_type}: {e}")
+        if direct:
+            for event_data in events.tolist() if hasattr(events, "tolist") else events:
+                for callback in direct:
+                    try:
+                        callback(event_data)
+                    except Exception as e:
+                        print(f"Error occurred while executing callback for {event_type}: {e}")
+
+        for subscription in queued:
+            if subscription.batch:
+                self.enqueue(subscription, events)
+            elif subscription.policy is Policy.COALESCE or subscription.affinity is Affinity.UI and threading.get_ident() == self.ui_thread:
+                self.enqueue(subscription, events[-1])
+            else:
+                self.queue_of(subscription).put_many(subscription, events)
+
+    def enqueue(self, subscription, event_data):
+        """Hand an event to the queue of a UI or background subscriber."""
+        if subscription.affinity is Affinity.UI:
+            if threading.get_ident() == self.ui_thread:
+                # Anything still queued for this subscriber is older than this event
+                self.ui_queue.discard(subscription)
+                self.deliver(subscription, event_data)
+                return
+        self.queue_of(subscription).put(subscription, event_data)
+
+    def queue_of(self, subscription):
+        """Get the delivery queue of a UI or background subscriber."""
+        return self.ui_queue if subscription.affinity is Affinity.UI else self.background_queue
+
+    def deliver(self, subscription, event_data):
+        """Call a subscriber, errors are reported without affecting other subscribers."""
+        if not subscription.active:
+            return
+        try:
+            subscription.callback(event_data) if event_data is not None else subscription.callback()
+        except Exception as e:
+            print(f"Error occurred while executing callback for {subscription.event_type}: {e}")
+
+    def dropped(self):
+        """Get the number of events dropped or coalesced for queued subscribers."""
+        return sum(s.dropped for subscriptions in self.subscribers.values() for s in subscriptions)
+
+    def attach_ui(self, widget, interval=50):
+        """Start draining UI events on the main loop of a Tk widget every `interval` ms."""
+        self.detach_ui()
+        self.ui_widget = widget
+        self.ui_thread = threading.get_ident()
+        self.ui_interval = interval
+        self.ui_after_id = widget.after(self.ui_interval, self.pump_ui)
+
+    def detach_ui(self):
+        """Stop the UI pump."""
+        if self.ui_widget is not None and self.ui_after_id is not None:
+            try:
+                self.ui_widget.after_cancel(self.ui_after_id)
+            except Exception:
+                pass
+        self.ui_widget = None
+        self.ui_thread = None
+        self.ui_after_id = None
+
+    def pump_ui(self):
+        """Deliver the queued events to the UI subscribers."""
+        for subscription, event_data in self.ui_queue.take():
+            self.deliver(subscription, event_data)
+
+        if self.ui_widget is not None:
+            self.ui_after_id = self.ui_widget.after(self.ui_interval, self.pump_ui)
+
+    def start_background(self):
+        """Start the dispatcher thread for background subscribers."""
+        with self.lock:
+            if self.background_thread is not None:
+                return
+            self.background_thread = threading.Thread(target=self.run_background, name="event-bus-dispatch", daemon=True)
+        self.background_thread.start()
+
+    def run_background(self):
+        """Deliver queued events to background subscribers as they arrive."""
+        while True:
+            self.background_queue.ready.wait()
+            for subscription, event_data in self.background_queue.take():
+                self.deliver(subscription, event_data)
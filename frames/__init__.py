@@ -1,4 +1,5 @@
 from frames.plot_frame import PlotFrame
+from frames.device_plots_frame import DevicePlotsFrame
 from frames.settings_frame import SettingsFrame
 from frames.sidebar_frame import SidebarFrame
 from frames.status_bar_frame import StatusBarFrame
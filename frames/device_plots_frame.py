@@ -0,0 +1,44 @@
+from config import Config
+from frames.base_frame import BaseFrame
+from frames.plot_frame import PlotFrame
+
+
+class DevicePlotsFrame(BaseFrame):
+    """Plots of several device sessions side by side."""
+    def __init__(self, master, device_manager, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+
+        self.device_manager = device_manager
+        self.m_config = Config()
+        self.plot_frames = []
+
+        self.grid_rowconfigure(0, weight=1)
+        self.init_widgets()
+        self.set_defaults()
+
+    def get_history_points(self):
+        """Get the history length of each plot, by default the single plot history is shared among the sessions."""
+        history_points = self.m_config.get("devices", "history_points")
+        if history_points:
+            return history_points
+        total = self.m_config.get("plot", "history_points") or 1048576
+        share = max(total // max(len(self.device_manager.sessions), 1), 65536)
+        # Rounded down to a power of two like the default history
+        return 1 << (share.bit_length() - 1)
+
+    def init_widgets(self):
+        history_points = self.get_history_points()
+        for column, session in enumerate(self.device_manager.sessions.values()):
+            plot_frame = PlotFrame(self, session=session, history_points=history_points, fg_color="white")
+            plot_frame.grid(row=0, column=column, padx=5, pady=5, sticky="nsew")
+            self.grid_columnconfigure(column, weight=1, uniform="plots")
+            self.plot_frames.append(plot_frame)
+
+    def set_defaults(self):
+        pass
+
+    @property
+    def canvas(self):
+        """Get a canvas once every plot has been built, None before."""
+        canvases = [plot_frame.canvas for plot_frame in self.plot_frames]
+        return canvases[0] if canvases and all(canvas is not None for canvas in canvases) else None
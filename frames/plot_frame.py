@@ -1,64 +1,108 @@
-import queue
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from scipy.interpolate import interp1d
+import time
 import sercom
 from sercom.fastprotoc import PacketType
 from config import Config
-from event_bus import EventBus, Event
+from event_bus import EventBus, Event, Affinity
 from frames.base_frame import BaseFrame
+from metrics import Metrics, StartupProfiler
+from plotting import CatmullRomSmoother, MinMaxPyramid, RenderScheduler, AxisHysteresis
 
 
 class PlotFrame(BaseFrame):
-    def __init__(self, master, *args, **kwargs):
+    def __init__(self, master, *args, session=None, history_points=None, **kwargs):
         super().__init__(master, *args, **kwargs)
 
-        self.sercom = sercom.Sercom()
+        # Without a session the frame plots the default session and overlays its canvas on the master grid cell
+        self.session = session
+        self.sercom = session if session is not None else sercom.Sercom()
         self.event_bus = EventBus()
         self.m_config = Config()
 
         self.after_ids = []
-        self.hall_queue = queue.Queue()
-        self.pwm_queue = queue.Queue()
-        self.sercom.add_getter_queue(PacketType.HALL_UPDATE.value, self.hall_queue)
-        self.sercom.add_getter_queue(PacketType.PWM_UPDATE.value, self.pwm_queue)
-
         self.padding = 20
-        self.prev_padding_value = 0
-        self.max_data_points = 250
-        self.scroll_threshold = self.max_data_points / 50
+        self.history_points = history_points or self.m_config.get("plot", "history_points") or 1048576
+        self.window_seconds = self.m_config.get("plot", "window_seconds") or 5
+        self.min_window_seconds = 0.05
+        self.follow = True
+        self.view_end = None
+        self.pan_start = None
+        self.plotting = False
+        self.render_after_id = None
+
+        self.scheduler = RenderScheduler()
+        self.max_redraws_per_second = self.m_config.get("plot", "max_redraws_per_second") or 4
+        self.x_hysteresis = AxisHysteresis(lead=0.2)
+        self.y_hysteresis = AxisHysteresis(margin=self.padding / 100)
+        self.pending_limits = {}
+        self.force_redraw = False
+        self.last_full_redraw = -np.inf
+        self.background = None
+        self.canvas = None
+        self.init_after_id = None
+
+        self.metrics = Metrics()
+        self.render_latency = self.metrics.histogram("render_latency_seconds", "Age of the newest sample when it is drawn")
+        self.render_cost = self.metrics.histogram("render_seconds", "Time spent in a plot render tick")
+        self.dropped_counter = self.metrics.counter("plot_dropped_samples", "Samples overwritten before the plot read them")
+        self.queue_depth = self.metrics.gauge("plot_queue_depth", "Samples waiting for the plot at the last render tick")
+        self.newest_sample = None
+
+        self.telemetry = sercom.TelemetryRing(65536)
+        self.telemetry_cursor = 0
+        self.sercom.add_telemetry_ring(self.telemetry, (PacketType.HALL_UPDATE.value, PacketType.PWM_UPDATE.value))
 
         self.setpoint = 0
-        self.x_hall_data = []
-        self.y_hall_data = []
-        self.y_setpoint_data = []
-        self.x_pwm_data = []
-        self.y_pwm_data = []
+        self.hall_history = sercom.TelemetryRing(self.history_points)
+        self.hall_envelope = MinMaxPyramid(self.hall_history)
+        self.pwm_history = sercom.TelemetryRing(self.history_points)
+        self.pwm_envelope = MinMaxPyramid(self.pwm_history)
+        # The setpoint only changes occasionally, store the change points only
+        self.setpoint_history = sercom.TelemetryRing(4096)
+
+        self.render_mode = self.m_config.get("plot", "render_mode") or "raw"
+        self.smoother = CatmullRomSmoother(4096) if self.render_mode == "smooth" else None
 
         self.master = master
-        self.init_widgets()
         self.set_defaults()
 
-        self.event_bus.subscribe(Event.SERIAL_OPENED.value, self.start_plotting)
-        self.event_bus.subscribe(Event.SERIAL_CLOSED.value, self.stop_plotting)
-        self.event_bus.subscribe(PacketType.SETPOINT_UPDATE.value, self.setpoint_update_callback)
-        self.event_bus.subscribe("WM_DELETE_WINDOW", self.window_close_callback)
+        # matplotlib is imported and the figure built once the window is shown, or on connect
+        if self.m_config.get("plot", "lazy_init") != "connect":
+            self.init_after_id = self.after(self.m_config.get("plot", "init_delay") or 100, self.init_plot)
+
+        self.event_bus.subscribe(self.sercom.topic(Event.SERIAL_OPENED.value), self.start_plotting, Affinity.UI)
+        self.event_bus.subscribe(self.sercom.topic(Event.SERIAL_CLOSED.value), self.stop_plotting, Affinity.UI)
+        self.event_bus.subscribe(self.sercom.topic(PacketType.SETPOINT_UPDATE.value), self.setpoint_update_callback, Affinity.UI)
+        self.event_bus.subscribe("WM_DELETE_WINDOW", self.window_close_callback, Affinity.UI)
+
+    def init_plot(self):
+        """Build the figure, does nothing if it already exists."""
+        self.init_after_id = None
+        if self.canvas is not None:
+            return
+        with StartupProfiler().section("PlotFrame.init_plot"):
+            self.init_widgets()
+            self.canvas.draw()
 
     def init_widgets(self):
-        self.fig, (self.ax1, self.ax2) = plt.subplots(2, 1, figsize=(9, 9), gridspec_kw={"height_ratios": [5, 3]}, constrained_layout=True)
+        # Figure and the Tk backend are used without pyplot, which is slow to import
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.fig = Figure(figsize=(9, 9), constrained_layout=True)
+        self.ax1, self.ax2 = self.fig.subplots(2, 1, gridspec_kw={"height_ratios": [5, 3]})
 
-        self.hall_line, = self.ax1.plot([], [], lw=2)
-        self.setpoint_line, = self.ax1.plot([], [], lw=2, linestyle="--", color="red")
+        self.hall_line, = self.ax1.plot([], [], lw=2, animated=True)
+        self.setpoint_line, = self.ax1.plot([], [], lw=2, linestyle="--", color="red", drawstyle="steps-post", animated=True)
         self.ax1.set_xlabel("Time", fontsize=12)
         self.ax1.set_ylabel("Sensor Output", fontsize=12)
         self.ax1.tick_params(axis="both", which="major", labelsize=10)
         self.ax1.grid(True, linestyle="--", alpha=0.7)
-        self.ax1.set_title("Hall-Sensor Output", fontsize=14, fontweight="bold")
+        title_suffix = f" ({self.session.name})" if self.session is not None else ""
+        self.ax1.set_title(f"Hall-Sensor Output{title_suffix}", fontsize=14, fontweight="bold")
         self.ax1.set_ylim(-45, 545)
 
-        self.pwm_line, = self.ax2.plot([], [], lw=1)
+        self.pwm_line, = self.ax2.plot([], [], lw=1, drawstyle="steps-post", animated=True)
         self.ax2.set_xlabel("Time", fontsize=12)
         self.ax2.set_ylabel("Value", fontsize=12)
         self.ax2.tick_params(axis="both", which="major", labelsize=10)
@@ -66,14 +110,30 @@ class PlotFrame(BaseFrame):
         self.ax2.set_title("PWM Signal", fontsize=14, fontweight="bold")
         self.ax2.set_ylim(-45, 295)
 
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.master)
-        self.canvas.get_tk_widget().grid(row=0, column=1, padx=(50, 50), pady=(50, 50), sticky="nsew")
+        if self.session is None:
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self.master)
+            self.canvas.get_tk_widget().grid(row=0, column=1, padx=(50, 50), pady=(50, 50), sticky="nsew")
+        else:
+            self.grid_rowconfigure(0, weight=1)
+            self.grid_columnconfigure(0, weight=1)
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+            self.canvas.get_tk_widget().grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+
+        self.canvas.mpl_connect("draw_event", self.draw_callback)
+        self.canvas.mpl_connect("scroll_event", self.scroll_callback)
+        self.canvas.mpl_connect("button_press_event", self.button_press_callback)
+        self.canvas.mpl_connect("motion_notify_event", self.motion_callback)
+        self.canvas.mpl_connect("button_release_event", self.button_release_callback)
 
     def set_defaults(self):
         pass
 
     def window_close_callback(self, event_data=None):
         """Callback function for window close event."""
+        self.plotting = False
+        self.cancel_render()
+        if self.init_after_id is not None:
+            self.after_cancel(self.init_after_id)
         for after_id in self.after_ids:
             self.after_cancel(after_id)
 
@@ -81,73 +141,227 @@ class PlotFrame(BaseFrame):
         """Callback function for update setpoint event."""
         self.setpoint = event_data
 
+    def scroll_callback(self, event):
+        """Zoom the time axis around the mouse position."""
+        view = self.get_view()
+        if view is None:
+            return
+
+        factor = 1 / 1.25 if event.button == "up" else 1.25
+        max_window = max(self.get_latest_x() - self.get_oldest_x(), self.min_window_seconds)
+        new_window = min(max(self.window_seconds * factor, self.min_window_seconds), max_window)
+
+        if not self.follow and event.xdata is not None:
+            self.view_end = event.xdata + (view[1] - event.xdata) * new_window / self.window_seconds
+        self.window_seconds = new_window
+        self.redraw_view()
+
+    def button_press_callback(self, event):
+        """Start panning, a double click returns to the live view."""
+        if event.dblclick:
+            self.follow = True
+            self.pan_start = None
+            self.redraw_view()
+        elif event.inaxes is not None and event.button == 1 and self.get_view() is not None:
+            self.pan_start = (event.x, self.get_view()[1], event.inaxes.bbox.width)
+
+    def motion_callback(self, event):
+        """Pan the time axis while the mouse is dragged."""
+        if self.pan_start is None:
+            return
+
+        start_x, start_end, width = self.pan_start
+        self.follow = False
+        self.view_end = min(start_end - (event.x - start_x) * self.window_seconds / width, self.get_latest_x())
+        self.redraw_view()
+
+    def button_release_callback(self, event):
+        """Stop panning and follow live data again when dragged to the newest sample."""
+        if self.pan_start is not None and self.view_end is not None and self.view_end >= self.get_latest_x():
+            self.follow = True
+        self.pan_start = None
+
+    def redraw_view(self):
+        """Redraw after a user view change."""
+        self.force_redraw = True
+        if not self.plotting and self.canvas is not None:
+            self.update_plot()
+            self.full_redraw()
+
+    def get_latest_x(self):
+        """Get the timestamp of the newest sample."""
+        latest = -np.inf
+        for history in (self.hall_history, self.pwm_history):
+            if history.head:
+                latest = max(latest, history.timestamps[(history.head - 1) % history.capacity])
+        return latest
+
+    def get_oldest_x(self):
+        """Get the timestamp of the oldest sample still in the history."""
+        return min(history.latest()[0][0] for history in (self.hall_history, self.pwm_history) if history.head)
+
+    def get_view(self):
+        """Get the visible time range."""
+        latest = self.get_latest_x()
+        if latest == -np.inf:
+            return None
+        end = latest if self.follow or self.view_end is None else self.view_end
+        return end - self.window_seconds, end
+
     def start_plotting(self, event_data=None):
-        self.animation = animation.FuncAnimation(self.fig, self.update_plot, interval=20, cache_frame_data=False, blit=True)
+        self.init_plot()
+        self.plotting = True
+        self.scheduler.reset()
+        self.force_redraw = True
+        self.cancel_render()
+        self.schedule_render()
 
     def stop_plotting(self, event_data=None):
+        self.plotting = False
+        self.cancel_render()
         for after_id in self.after_ids:
             self.after_cancel(after_id)
 
-        self.animation.event_source.stop()
+        if self.canvas is not None:
+            self.canvas.draw()
+
+    def schedule_render(self):
+        """Schedule the next render tick at the interval chosen by the scheduler."""
+        self.render_after_id = self.after(int(self.scheduler.interval * 1000), self.render_tick)
+
+    def cancel_render(self):
+        """Cancel the scheduled render tick."""
+        if self.render_after_id is not None:
+            self.after_cancel(self.render_after_id)
+            self.render_after_id = None
+
+    def render_tick(self):
+        """Update the traces, blitting in the steady state and redrawing fully when limits change."""
+        self.render_after_id = None
+        started = self.scheduler.tick_started()
+
+        self.update_plot()
+        redraw_due = started - self.last_full_redraw >= 1 / self.max_redraws_per_second
+        if self.background is None or self.force_redraw or (self.pending_limits and redraw_due):
+            self.full_redraw()
+        else:
+            self.blit()
+
+        self.scheduler.tick_finished(started)
+        if self.metrics.enabled:
+            self.render_cost.record(time.perf_counter() - started)
+            if self.newest_sample is not None:
+                self.render_latency.record(max(time.time() - self.newest_sample, 0.0))
+                self.newest_sample = None
+        if self.plotting:
+            self.schedule_render()
+
+    def full_redraw(self):
+        """Apply pending axis limits and redraw the whole figure."""
+        for set_limits, limits in self.pending_limits.items():
+            set_limits(*limits)
+        self.pending_limits = {}
+        self.force_redraw = False
+        self.last_full_redraw = time.perf_counter()
+        # draw_callback captures the new background and draws the traces on top
         self.canvas.draw()
 
-    def update_plot(self, frame):
-        """Update plot from data queue."""
-        while not self.hall_queue.empty():
-            new_x, new_y = self.hall_queue.get()
-            self.x_hall_data.append(new_x)
-            self.y_hall_data.append(new_y)
-            self.y_setpoint_data.append(self.setpoint)
-
-            if len(self.x_hall_data) > self.max_data_points:
-                self.x_hall_data = self.x_hall_data[-self.max_data_points:]
-                self.y_hall_data = self.y_hall_data[-self.max_data_points:]
-                self.y_setpoint_data = self.y_setpoint_data[-self.max_data_points:]
-
-            if new_x > self.scroll_threshold:
-                self.ax1.set_xlim(new_x - self.scroll_threshold, new_x)
-
-        while not self.pwm_queue.empty():
-            new_x, new_y = self.pwm_queue.get()
-            self.x_pwm_data.append(new_x)
-
-            prev_y = self.y_pwm_data[-1] if len(self.y_pwm_data) > 0 else None
-            if prev_y is not None and (new_y > 0 and new_y < 255):
-                self.y_pwm_data.append(255)
-            else:
-                self.y_pwm_data.append(new_y)
+    def draw_callback(self, event=None):
+        """Capture the static background after every full draw."""
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_traces()
+
+    def blit(self):
+        """Redraw only the traces on top of the cached background."""
+        self.canvas.restore_region(self.background)
+        self.draw_traces()
+        self.canvas.blit(self.fig.bbox)
+
+    def draw_traces(self):
+        """Draw the animated trace artists."""
+        for line in (self.hall_line, self.setpoint_line, self.pwm_line):
+            line.axes.draw_artist(line)
+
+    def propose_limits(self, set_limits, current, hysteresis, low, high):
+        """Queue an axis limit change if the data no longer fits the hysteresis band."""
+        limits = hysteresis.propose(current, low, high)
+        if limits is not None:
+            self.pending_limits[set_limits] = limits
 
-            if len(self.x_pwm_data) > self.max_data_points:
-                self.x_pwm_data = self.x_pwm_data[-self.max_data_points:]
-                self.y_pwm_data = self.y_pwm_data[-self.max_data_points:]
+    def read_telemetry(self):
+        """Move new samples from the telemetry ring into the trace histories."""
+        previous_cursor = self.telemetry_cursor
+        self.telemetry_cursor, timestamps, identifiers, values, dropped = self.telemetry.read_since(self.telemetry_cursor)
+        if self.metrics.enabled:
+            self.queue_depth.set(self.telemetry_cursor - previous_cursor)
+            self.dropped_counter.add(dropped)
+            if len(timestamps):
+                self.newest_sample = float(timestamps[-1])
 
-            if new_x > self.scroll_threshold:
-                self.ax2.set_xlim(new_x - self.scroll_threshold, new_x)
+        hall = identifiers == PacketType.HALL_UPDATE.value
+        if hall.any():
+            hall_x = timestamps[hall]
+            hall_y = values[hall]
+            start = self.hall_history.head
+            self.hall_history.write(hall_x, identifiers[hall], hall_y)
+            self.hall_envelope.update(start, len(hall_x))
+            if self.smoother is not None:
+                self.smoother.update(hall_x, hall_y)
 
-        if len(self.x_hall_data) < 4:
+            _, _, last_setpoint = self.setpoint_history.latest(1)
+            if len(last_setpoint) == 0 or last_setpoint[0] != np.float32(self.setpoint):
+                self.setpoint_history.write(hall_x[:1], identifiers[hall][:1], np.array([self.setpoint], dtype=np.float32))
+
+        pwm = identifiers == PacketType.PWM_UPDATE.value
+        if pwm.any():
+            pwm_x = timestamps[pwm]
+            pwm_y = values[pwm]
+
+            # Any partial duty cycle after the first sample is shown as fully on
+            partial = (pwm_y > 0) & (pwm_y < 255)
+            if len(self.pwm_history) == 0:
+                partial[0] = False
+            start = self.pwm_history.head
+            self.pwm_history.write(pwm_x, identifiers[pwm], np.where(partial, 255, pwm_y))
+            self.pwm_envelope.update(start, len(pwm_x))
+
+    def update_ylim(self, y_data):
+        """Rescale the hall sensor axis when the data leaves the padded range."""
+        self.propose_limits(self.ax1.set_ylim, self.ax1.get_ylim(), self.y_hysteresis, float(y_data.min()), float(y_data.max()))
+
+    def update_plot(self):
+        """Update the trace data from the telemetry ring."""
+        self.read_telemetry()
+
+        view = self.get_view()
+        if view is None:
+            return
+
+        x_min, x_max = view
+        if self.follow:
+            self.propose_limits(self.ax1.set_xlim, self.ax1.get_xlim(), self.x_hysteresis, x_min, x_max)
+            self.propose_limits(self.ax2.set_xlim, self.ax2.get_xlim(), self.x_hysteresis, x_min, x_max)
+        elif self.ax1.get_xlim() != view:
+            self.pending_limits[self.ax1.set_xlim] = view
+            self.pending_limits[self.ax2.set_xlim] = view
+        max_points = max(int(self.ax1.bbox.width), 100)
+
+        x_hall_data, y_hall_data, level = self.hall_envelope.query(x_min, x_max, max_points)
+        if len(x_hall_data) < 2:
             self.hall_line.set_data([], [])
             self.setpoint_line.set_data([], [])
         else:
-            f_interp = interp1d(self.x_hall_data, self.y_hall_data, kind="cubic")
-            x_interp = np.linspace(min(self.x_hall_data), max(self.x_hall_data), 1000)
-            y_interp = f_interp(x_interp)
-
-            y_range = max(y_interp) - min(y_interp)
-            padding_value = y_range * self.padding / 100
-
-            if abs(padding_value - self.prev_padding_value) >= 1.5:
-                min_y = min(y_interp) - padding_value
-                max_y = max(y_interp) + padding_value
-                self.ax1.set_ylim(min_y, max_y)
-                self.prev_padding_value = padding_value
-                self.canvas.draw()
-
-            self.hall_line.set_data(x_interp, y_interp)
-            self.setpoint_line.set_data(self.x_hall_data, self.y_setpoint_data)
-            pwm_step = np.array(self.y_pwm_data[:-1])
-            pwm_step = np.repeat(pwm_step, 25)
-            pwm_step = np.insert(pwm_step, 0, pwm_step[0])
-            self.x_pwm_step = np.linspace(min(self.x_pwm_data), max(self.x_pwm_data), len(pwm_step))
-            self.pwm_line.set_data(self.x_pwm_step, pwm_step)
-
-        return self.hall_line, self.setpoint_line, self.pwm_line
+            x_smooth, y_smooth = self.smoother.latest() if self.smoother is not None else (x_hall_data[:0], None)
+            if level == 0 and len(x_smooth) and x_smooth[0] <= x_hall_data[0]:
+                first = np.searchsorted(x_smooth, x_hall_data[0])
+                self.hall_line.set_data(x_smooth[first:], y_smooth[first:])
+            else:
+                self.hall_line.set_data(x_hall_data, y_hall_data)
+
+            # Extend the last setpoint step to the right edge of the view
+            x_setpoint, _, y_setpoint = self.setpoint_history.latest()
+            self.setpoint_line.set_data(np.append(x_setpoint, x_hall_data[-1]), np.append(y_setpoint, y_setpoint[-1]))
+            self.update_ylim(y_hall_data)
+
+        x_pwm_data, y_pwm_data, _ = self.pwm_envelope.query(x_min, x_max, max_points)
+        self.pwm_line.set_data(x_pwm_data, y_pwm_data)
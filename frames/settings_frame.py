@@ -1,10 +1,9 @@
 import customtkinter
-import queue
 import tkinter
 import widgets
 import sercom
 from sercom.fastprotoc import PacketType
-from event_bus import EventBus, Event
+from event_bus import EventBus, Event, Affinity
 from frames.base_frame import BaseFrame
 
 
@@ -16,10 +15,12 @@ class SettingsFrame(BaseFrame):
         self.event_bus = EventBus()
 
         self.realtime_enabled = tkinter.BooleanVar()
-        self.setpoint_queue = queue.Queue()
-        self.kp_queue = queue.Queue()
-        self.ki_queue = queue.Queue()
-        self.kd_queue = queue.Queue()
+        self.packet_types = {
+            "setpoint": PacketType.SETPOINT_UPDATE.value,
+            "kp": PacketType.KP_UPDATE.value,
+            "ki": PacketType.KI_UPDATE.value,
+            "kd": PacketType.KD_UPDATE.value
+        }
         self.prev_values = {
             "setpoint": None,
             "kp": None,
@@ -31,16 +32,11 @@ class SettingsFrame(BaseFrame):
         self.init_widgets()
         self.set_defaults()
 
-        self.sercom.add_setter_queue(PacketType.SETPOINT_UPDATE.value, self.setpoint_queue)
-        self.sercom.add_setter_queue(PacketType.KP_UPDATE.value, self.kp_queue)
-        self.sercom.add_setter_queue(PacketType.KI_UPDATE.value, self.ki_queue)
-        self.sercom.add_setter_queue(PacketType.KD_UPDATE.value, self.kd_queue)
-
-        self.event_bus.subscribe(Event.SERIAL_CLOSED.value, self.set_defaults)
-        self.event_bus.subscribe(PacketType.SETPOINT_UPDATE.value, lambda event_data: self.update_callback("setpoint")(event_data))
-        self.event_bus.subscribe(PacketType.KP_UPDATE.value, lambda event_data: self.update_callback("kp")(event_data))
-        self.event_bus.subscribe(PacketType.KI_UPDATE.value, lambda event_data: self.update_callback("ki")(event_data))
-        self.event_bus.subscribe(PacketType.KD_UPDATE.value, lambda event_data: self.update_callback("kd")(event_data))
+        self.event_bus.subscribe(Event.SERIAL_CLOSED.value, self.set_defaults, Affinity.UI)
+        self.event_bus.subscribe(PacketType.SETPOINT_UPDATE.value, lambda event_data: self.update_callback("setpoint")(event_data), Affinity.UI)
+        self.event_bus.subscribe(PacketType.KP_UPDATE.value, lambda event_data: self.update_callback("kp")(event_data), Affinity.UI)
+        self.event_bus.subscribe(PacketType.KI_UPDATE.value, lambda event_data: self.update_callback("ki")(event_data), Affinity.UI)
+        self.event_bus.subscribe(PacketType.KD_UPDATE.value, lambda event_data: self.update_callback("kd")(event_data), Affinity.UI)
 
     def init_widgets(self):
         self.frame_title = customtkinter.CTkLabel(self, text="Settings", font=customtkinter.CTkFont(size=18, weight="bold"))
@@ -96,9 +92,8 @@ class SettingsFrame(BaseFrame):
         """Callback function for a specific key (GUI)."""
         def callback():
             value = self.get_current_value(key)
-            queue = getattr(self, f"{key}_queue")
-            if self.realtime_switch.get() and queue is not None:
-                queue.put(value)
+            if self.realtime_switch.get():
+                self.sercom.set_parameter(self.packet_types[key], value)
             elif self.sercom.is_connected():
                 self.apply_button.configure(state="normal")
         return callback
@@ -117,9 +112,7 @@ class SettingsFrame(BaseFrame):
         for key in self.prev_values:
             current_value = self.get_current_value(key)
             if current_value != self.prev_values[key]:
-                queue = getattr(self, f"{key}_queue")
-                if queue is not None:
-                    queue.put(current_value)
+                self.sercom.set_parameter(self.packet_types[key], current_value)
                 self.prev_values[key] = current_value
         self.apply_button.configure(state="disabled")
 
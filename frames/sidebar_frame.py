@@ -1,9 +1,8 @@
-import asyncio
 import customtkinter
 import sercom
 from config import Config
 from cache import PersistentCache
-from event_bus import EventBus, Event
+from event_bus import EventBus, Event, Affinity, Policy
 from frames.base_frame import BaseFrame
 
 
@@ -18,6 +17,7 @@ class SidebarFrame(BaseFrame):
         self.m_config = Config()
 
         self.after_ids = []
+        self.pending_future = None
         self.available_ports = ["None"]
         self.baudrates = ["115200", "9600"]
         self.appearance_modes = ["Light", "Dark", "System"]
@@ -26,11 +26,17 @@ class SidebarFrame(BaseFrame):
         self.grid_rowconfigure(5, weight=1)
         self.init_widgets()
         self.set_defaults()
-        self.get_available_ports()
 
-        self.event_bus.subscribe(Event.SERIAL_OPENED.value, self.serial_opened_callback)
-        self.event_bus.subscribe(Event.SERIAL_CLOSED.value, self.serial_closed_callback)
-        self.event_bus.subscribe("WM_DELETE_WINDOW", self.window_close_callback)
+        self.event_bus.subscribe(Event.SERIAL_OPENED.value, self.serial_opened_callback, Affinity.UI)
+        self.event_bus.subscribe(Event.SERIAL_CLOSED.value, self.serial_closed_callback, Affinity.UI)
+        self.event_bus.subscribe("WM_DELETE_WINDOW", self.window_close_callback, Affinity.UI)
+        # Every reload carries its own changed keys, none may be coalesced away
+        self.event_bus.subscribe(Event.CONFIG_CHANGED.value, self.config_changed_callback, Affinity.UI, Policy.DROP_OLDEST)
+        self.event_bus.subscribe(Event.PORTS_CHANGED.value, self.update_available_ports, Affinity.UI)
+
+        port_watcher = self.sercom.watch_ports()
+        if port_watcher.ports is not None:
+            self.update_available_ports(port_watcher.ports)
 
     def init_widgets(self):
         self.logo_label = customtkinter.CTkLabel(self, text="Levitator", font=customtkinter.CTkFont(size=20, weight="bold"))
@@ -80,16 +86,29 @@ class SidebarFrame(BaseFrame):
         for after_id in self.after_ids:
             self.after_cancel(after_id)
 
+    def config_changed_callback(self, changed_keys):
+        """Callback function for config change event, applies edits made to the config file."""
+        if ("appearance_mode",) in changed_keys:
+            appearance_mode = self.m_config.get("appearance_mode")
+            if appearance_mode != self.appearance_mode_optionemenu.get():
+                self.appearance_mode_optionemenu.set(appearance_mode)
+                customtkinter.set_appearance_mode(appearance_mode)
+        if ("scaling",) in changed_keys:
+            scaling = str(self.m_config.get("scaling"))
+            if scaling != self.scaling_optionemenu.get():
+                self.scaling_optionemenu.set(scaling)
+                customtkinter.set_widget_scaling(int(scaling.replace("%", "")) / 100)
+
     def appearance_mode_callback(self, new_appearance_mode: str):
         """Callback function for appearance mode change event."""
         customtkinter.set_appearance_mode(new_appearance_mode)
-        self.m_config.set("appearance_mode", new_appearance_mode)
+        self.m_config.set("appearance_mode", value=new_appearance_mode)
 
     def scaling_callback(self, new_scaling: str):
         """Callback function for scaling change event."""
         new_scaling_float = int(new_scaling.replace("%", "")) / 100
         customtkinter.set_widget_scaling(new_scaling_float)
-        self.m_config.set("scaling", new_scaling)
+        self.m_config.set("scaling", value=new_scaling)
 
     def serial_option_menu_callback(self, port):
         """Callback function for serial port select event."""
@@ -109,40 +128,50 @@ class SidebarFrame(BaseFrame):
         self.connect_button.configure(text="Connect")
         self.baud_option_menu.configure(state="normal")
 
-    def get_available_ports(self):
-        """Get available serial ports."""
-        self.update_available_ports()
-        self.after_ids.append(self.after(1000, self.get_available_ports))
-
-    def update_available_ports(self):
-        """Update available serial ports."""
+    def update_available_ports(self, ports):
+        """Callback function for port change event, the port watcher only publishes changed port lists."""
         prev = self.available_ports
-        self.available_ports = sercom.get_available_ports()
+        self.available_ports = list(ports)
 
         new_state = "disabled" if self.available_ports[0] == "None" else "normal"
         self.serial_option_menu.configure(state=new_state)
         self.baud_option_menu.configure(state=new_state)
-        self.connect_button.configure(state=new_state)
+        if self.pending_future is None:
+            self.connect_button.configure(state=new_state)
 
         if self.available_ports != prev:
             self.serial_option_menu.configure(values=self.available_ports)
 
-        if self.serial_option_menu.get() not in self.available_ports:
-            asyncio.run(self.sercom.disconnect())
+        if self.serial_option_menu.get() not in self.available_ports and self.pending_future is None:
+            self.watch_future(self.sercom.submit(self.sercom.disconnect()), "disconnect")
             self.serial_option_menu.set(self.available_ports[0])
 
     def connect_to_port(self):
         """Connect to serial port."""
         port = self.serial_option_menu.get()
         baud = self.baud_option_menu.get()
-        if port == "None":
+        if port == "None" or self.pending_future is not None:
             return
 
         if self.connect_button.cget("text") == "Connect":
-            try:
-                self.cache.set("prev_com", port)
-                asyncio.run(self.sercom.connect(port, baud))
-            except Exception as e:
-                print(f"Failed to connect: {e}")
+            self.cache.set("prev_com", port)
+            self.watch_future(self.sercom.submit(self.sercom.connect(port, baud)), "connect")
         elif self.connect_button.cget("text") == "Disconnect":
-            asyncio.run(self.sercom.disconnect())
+            self.watch_future(self.sercom.submit(self.sercom.disconnect()), "disconnect")
+
+    def watch_future(self, future, action):
+        """Poll a connect/disconnect future without blocking the main loop."""
+        self.pending_future = future
+        self.connect_button.configure(state="disabled")
+        self.poll_future(future, action)
+
+    def poll_future(self, future, action):
+        """Check if the pending connect/disconnect future has completed."""
+        if not future.done():
+            self.after_ids.append(self.after(50, self.poll_future, future, action))
+            return
+
+        self.pending_future = None
+        self.connect_button.configure(state="normal")
+        if future.exception() is not None:
+            print(f"Failed to {action}: {future.exception()}")
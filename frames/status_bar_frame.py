@@ -1,9 +1,13 @@
+import time
 import tkinter
 import customtkinter
 import widgets
 from config import Config
-from event_bus import EventBus, Event
+from event_bus import EventBus, Event, Affinity
 from frames.base_frame import BaseFrame
+from metrics import Metrics
+
+METRICS_INTERVAL = 1000
 
 
 class StatusBarFrame(BaseFrame):
@@ -16,13 +20,22 @@ class StatusBarFrame(BaseFrame):
         self.version = self.m_config.get("version")
         self.connection_state = tkinter.BooleanVar()
 
+        self.metrics = Metrics()
+        self.tk_lag = self.metrics.histogram("tk_loop_lag_seconds", "Delay of Tk timer callbacks behind their schedule")
+        self.metrics_after_id = None
+        self.metrics_expected = None
+
         self.grid_columnconfigure(1, weight=1)
         self.init_widgets()
         self.set_defaults()
 
-        self.event_bus.subscribe(Event.SERIAL_OPENED.value, self.serial_opened_callback)
-        self.event_bus.subscribe(Event.SERIAL_CLOSED.value, self.serial_closed_callback)
-        self.event_bus.subscribe(Event.LOGGER_EVENT.value, self.logger_event_callback)
+        self.event_bus.subscribe(Event.SERIAL_OPENED.value, self.serial_opened_callback, Affinity.UI)
+        self.event_bus.subscribe(Event.SERIAL_CLOSED.value, self.serial_closed_callback, Affinity.UI)
+        self.event_bus.subscribe(Event.LOGGER_EVENT.value, self.logger_event_callback, Affinity.UI)
+        self.event_bus.subscribe("WM_DELETE_WINDOW", self.window_close_callback, Affinity.UI)
+
+        if self.metrics.enabled:
+            self.schedule_metrics()
 
     def init_widgets(self):
         self.version_hint = widgets.StatusIcon(self)
@@ -31,13 +44,17 @@ class StatusBarFrame(BaseFrame):
         self.debug_output = customtkinter.CTkLabel(self, compound="right", width=18, height=20)
         self.debug_output.grid(row=0, column=1, padx=(20, 0), pady=(5, 5), sticky="nsw")
         
+        self.metrics_output = customtkinter.CTkLabel(self, height=20, text_color="gray50")
+        self.metrics_output.grid(row=0, column=2, padx=(10, 0), pady=(5, 5), sticky="nse")
+
         self.connection_hint = widgets.StatusIcon(self, image_light="img/signal-light.png", image_dark="img/signal-dark.png", text="Disconnected")
-        self.connection_hint.grid(row=0, column=2, padx=(10, 0), pady=(5, 5), sticky="nsew")
+        self.connection_hint.grid(row=0, column=3, padx=(10, 0), pady=(5, 5), sticky="nsew")
 
     def set_defaults(self):
         text = "Version {}".format(self.version)
         self.version_hint.configure(text=text)
         self.debug_output.configure(text="")
+        self.metrics_output.configure(text="")
 
     def serial_opened_callback(self, event_data=None):
         """Callback function for serial connect event."""
@@ -51,3 +68,34 @@ class StatusBarFrame(BaseFrame):
         """Callback function for updating the debug output label"""
         text, color = event_data
         self.debug_output.configure(text=text, text_color=color)
+
+    def window_close_callback(self, event_data=None):
+        """Callback function for window close event."""
+        if self.metrics_after_id is not None:
+            self.after_cancel(self.metrics_after_id)
+            self.metrics_after_id = None
+
+    def schedule_metrics(self):
+        """Schedule the next metrics summary update."""
+        self.metrics_expected = time.perf_counter() + METRICS_INTERVAL / 1000
+        self.metrics_after_id = self.after(METRICS_INTERVAL, self.update_metrics)
+
+    def update_metrics(self):
+        """Show a compact metrics summary, the timer delay doubles as the Tk loop lag."""
+        self.tk_lag.record(max(time.perf_counter() - self.metrics_expected, 0.0))
+
+        counters = self.metrics.counters
+        histograms = self.metrics.histograms
+        parts = []
+        if "serial_frames" in counters:
+            parts.append(f"{counters['serial_frames'].rate():,.0f} frames/s")
+            parts.append(f"{counters['serial_bytes'].rate() / 1000:.1f} kB/s")
+            parts.append(f"bad {counters['serial_bad_frames'].total}")
+        if "plot_dropped_samples" in counters:
+            parts.append(f"dropped {counters['plot_dropped_samples'].total}")
+        if "render_latency_seconds" in histograms and histograms["render_latency_seconds"].count:
+            parts.append(f"latency p99 {histograms['render_latency_seconds'].percentile(99) * 1000:.1f} ms")
+        parts.append(f"lag p99 {self.tk_lag.percentile(99) * 1000:.1f} ms")
+        self.metrics_output.configure(text="  ".join(parts))
+
+        self.schedule_metrics()
@@ -1,13 +1,32 @@
+import atexit
+import threading
+import time
+from collections import deque, namedtuple
 from enum import Enum, auto
 from event_bus import EventBus, Event
 
 
 class LogLevel(Enum):
+    DEBUG = auto()
     INFO = auto()
     WARNING = auto()
     ERROR = auto()
 
 
+class LogRecord(namedtuple("LogRecord", ["timestamp", "level", "message", "args", "color", "thread"])):
+    """A log message, formatted only when a sink writes it."""
+    __slots__ = ()
+
+    def get_message(self):
+        """Get the message with its arguments applied."""
+        if not self.args:
+            return self.message
+        try:
+            return self.message % self.args
+        except (TypeError, ValueError):
+            return f"{self.message} {self.args}"
+
+
 class Logger:
     _instance = None
 
@@ -16,21 +35,120 @@ class Logger:
             cls._instance = super().__new__(cls)
             cls._instance.event_bus = EventBus()
             cls._instance.DEBUG_COLORS = {
+                LogLevel.DEBUG: "gray",
                 LogLevel.INFO: "green",
                 LogLevel.WARNING: "orange",
                 LogLevel.ERROR: "red"
             }
             cls._instance.sinks = []
+            cls._instance.level = LogLevel.INFO
+            cls._instance.queue_size = 10000
+            cls._instance.batch_size = 256
+            cls._instance.flush_interval = 0.5
+            cls._instance.records = deque()
+            cls._instance.dropped = 0
+            cls._instance.reported_dropped = 0
+            cls._instance.wakeup = threading.Event()
+            cls._instance.stopped = threading.Event()
+            cls._instance.writer = None
+            cls._instance._lock = threading.Lock()
+            atexit.register(cls._instance.shutdown)
         return cls._instance
 
+    def configure(self, level=None, queue_size=None, flush_interval=None):
+        """Set the minimum level, the queue bound and how often sinks are flushed."""
+        if level is not None:
+            self.level = level if isinstance(level, LogLevel) else LogLevel[str(level).upper()]
+        if queue_size is not None:
+            self.queue_size = queue_size
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+
     def add_sink(self, sink):
-        self.sinks.append(sink)
+        with self._lock:
+            self.sinks = self.sinks + [sink]
+        self.start()
+
+    def is_enabled_for(self, log_level):
+        """Check if messages of a level are logged at all."""
+        return log_level.value >= self.level.value
+
+    def log(self, log_level, message, *args):
+        """Queue a message, `args` are only applied if the level is enabled.
+
+        Never blocks, records are dropped and counted while the queue is full.
+        """
+        if log_level.value < self.level.value:
+            return
+        if len(self.records) >= self.queue_size:
+            self.dropped += 1
+            return
+
+        self.records.append(LogRecord(time.time(), log_level, message, args, self.DEBUG_COLORS.get(log_level), threading.current_thread().name))
+        if len(self.records) >= self.batch_size:
+            self.wakeup.set()
+
+    def start(self):
+        """Start the background writer."""
+        with self._lock:
+            if self.writer is not None and self.writer.is_alive():
+                return
+            self.stopped.clear()
+            self.writer = threading.Thread(target=self.run, name="log-writer", daemon=True)
+        self.writer.start()
+
+    def run(self):
+        """Write queued records in batches and flush the sinks periodically."""
+        last_flush = time.monotonic()
+        while True:
+            stopping = self.stopped.is_set()
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.drain()
+            if stopping or time.monotonic() - last_flush >= self.flush_interval:
+                for sink in self.sinks:
+                    try:
+                        sink.flush()
+                    except Exception as e:
+                        print(f"Error occurred while flushing log sink: {e}")
+                last_flush = time.monotonic()
+            if stopping:
+                return
+
+    def drain(self):
+        """Write every queued record to every sink."""
+        latest = None
+        while self.records:
+            batch = [self.records.popleft() for _ in range(min(len(self.records), self.batch_size))]
+            dropped = self.dropped - self.reported_dropped
+            if dropped:
+                self.reported_dropped += dropped
+                batch.append(LogRecord(time.time(), LogLevel.WARNING, "Dropped %d log records, the log queue was full", (dropped,), self.DEBUG_COLORS[LogLevel.WARNING], "log-writer"))
+            for sink in self.sinks:
+                try:
+                    sink.emit_many(batch)
+                except Exception as e:
+                    print(f"Error occurred while writing to log sink: {e}")
+            latest = batch[-1]
+
+        # Only the latest message is shown, publish it once per batch
+        if latest is not None:
+            self.event_bus.publish(Event.LOGGER_EVENT.value, (latest.get_message(), latest.color))
 
-    def log(self, log_level, message):
-        color = self.DEBUG_COLORS.get(log_level)
+    def shutdown(self):
+        """Write the remaining records and close the sinks."""
+        writer = self.writer
+        if writer is not None and writer.is_alive():
+            self.stopped.set()
+            self.wakeup.set()
+            writer.join(timeout=5)
+        else:
+            self.drain()
         for sink in self.sinks:
-            sink.process(message, color)
-        self.event_bus.publish(Event.LOGGER_EVENT.value, (message, color))
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"Error occurred while closing log sink: {e}")
 
     def rollback(self):
         for sink in self.sinks:
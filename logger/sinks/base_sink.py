@@ -3,4 +3,22 @@ class BaseSink:
         self.messages = []
 
     def process(self, message, color):
-        raise NotImplementedError("Subclasses must implement process_log method")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement process_log method")
+
+    def emit(self, record):
+        """Write a single record, called on the log writer thread."""
+        self.process(record.get_message(), record.color)
+
+    def emit_many(self, records):
+        """Write a batch of records."""
+        for record in records:
+            self.emit(record)
+
+    def flush(self):
+        """Flush buffered output."""
+
+    def close(self):
+        """Release the resources of the sink."""
+
+    def rollback(self):
+        """Archive the output of a previous session."""
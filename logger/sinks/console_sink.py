@@ -1,3 +1,4 @@
+import sys
 from datetime import datetime
 from logger.sinks.base_sink import BaseSink
 
@@ -5,6 +6,7 @@ from logger.sinks.base_sink import BaseSink
 class ConsoleSink(BaseSink):
     def __init__(self):
         self.colors = {
+            'gray': '\033[90m',
             'green': '\033[92m',
             'orange': '\033[93m',
             'red': '\033[91m'
@@ -13,4 +15,11 @@ class ConsoleSink(BaseSink):
     def process(self, message, color):
         """Print the message to the console with color."""
         console_color = self.colors.get(color.lower(), '')
-        print(f"{datetime.now()} - {console_color}{message}\033[0m")
\ No newline at end of file
+        print(f"{datetime.now()} - {console_color}{message}\033[0m")
+
+    def emit(self, record):
+        console_color = self.colors.get((record.color or '').lower(), '')
+        sys.stdout.write(f"{datetime.fromtimestamp(record.timestamp)} - {console_color}{record.get_message()}\033[0m\n")
+
+    def flush(self):
+        sys.stdout.flush()
@@ -1,15 +1,94 @@
+import gzip
+import json
 import os
+import queue
+import re
 import shutil
+import threading
+import time
 from datetime import datetime
 from logger.sinks.base_sink import BaseSink
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+ARCHIVE_NAME = re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?:_(\d+))?\.log")
+
+
+class Compressor:
+    """Compresses rotated log files on a background thread so the log writer never waits for it."""
+    def __init__(self, method):
+        if method == "zstd" and zstandard is None:
+            print("zstandard is not installed, compressing logs with gzip.")
+            method = "gzip"
+        self.method = method
+        self.jobs = queue.Queue()
+        self.thread = None
+
+    def submit(self, path, on_done=None):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="log-compressor", daemon=True)
+            self.thread.start()
+        self.jobs.put((path, on_done))
+
+    def run(self):
+        while True:
+            path, on_done = self.jobs.get()
+            try:
+                self.compress(path)
+            except Exception as e:
+                print(f"Error occurred while compressing {path}: {e}")
+            if on_done is not None:
+                on_done()
+            self.jobs.task_done()
+
+    def compress(self, path):
+        """Compress a file next to it, the original is removed once the archive is complete."""
+        target = path + COMPRESSION_SUFFIXES[self.method]
+        temp_path = target + ".tmp"
+        with open(path, "rb") as source:
+            if self.method == "zstd":
+                with open(temp_path, "wb") as f:
+                    zstandard.ZstdCompressor().copy_stream(source, f)
+            else:
+                with gzip.open(temp_path, "wb") as f:
+                    shutil.copyfileobj(source, f, 1 << 20)
+        os.replace(temp_path, target)
+        os.remove(path)
+
+    def wait(self, timeout=5.0):
+        """Wait until the submitted files have been compressed."""
+        deadline = time.monotonic() + timeout
+        while self.jobs.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
 
 class FileSink(BaseSink):
-    def __init__(self, log_dir="logs/"):
+    """Writes log records to `<start time>_latest.log` in `log_dir`.
+
+    The file is rotated once it grows beyond `max_bytes` or after
+    `rotate_interval` seconds, archived as `<start time>.log` and optionally
+    compressed with gzip or zstd. Only the newest `backup_count` archives are
+    kept. Records are written as text or, with `record_format="jsonl"`, as one
+    JSON object per line.
+    """
+    def __init__(self, log_dir="logs/", max_bytes=0, rotate_interval=0, backup_count=0, compression=None, record_format="text"):
         super().__init__()
         self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compressor = Compressor(compression) if compression else None
+        self.format = self.format_json if record_format == "jsonl" else self.format_text
+        self.file = None
+        self.file_path = None
+        self.size = 0
+        self.opened = 0.0
         self.create_log_dir()
-        self.file_path = self.get_log_filename()
+        self.rollback()
 
     def create_log_dir(self):
         """Create the log directory if it doesn't exist."""
@@ -20,28 +99,121 @@ class FileSink(BaseSink):
         """Generate a log filename with the current datetime."""
         return f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_latest.log"
 
+    def open(self):
+        """Open the log file once, it stays open until the sink is rotated or closed."""
+        if self.file is None:
+            self.file_path = os.path.join(self.log_dir, self.get_log_filename())
+            self.file = open(self.file_path, 'a', buffering=65536)
+            self.size = self.file.tell()
+            self.opened = time.monotonic()
+        return self.file
+
+    def format_text(self, record):
+        return f"{datetime.fromtimestamp(record.timestamp)} - {record.level.name} - {record.get_message()}\n"
+
+    def format_json(self, record):
+        return json.dumps({
+            "time": record.timestamp,
+            "level": record.level.name,
+            "thread": record.thread,
+            "message": record.get_message()
+        }, separators=(",", ":")) + "\n"
+
     def process(self, message, color):
         """Write the message to the log file."""
-        if self.find_latest_log_file() is not None:
-            self.rollback()
-        with open(self.file_path, 'a') as file:
-            file.write(f"{datetime.now()} - {message}\n")
+        self.write(f"{datetime.now()} - {message}\n")
+
+    def emit(self, record):
+        self.write(self.format(record))
+
+    def emit_many(self, records):
+        self.write("".join(self.format(record) for record in records))
+
+    def write(self, text):
+        if self.file is not None and self.should_rotate():
+            self.rotate()
+        self.open().write(text)
+        self.size += len(text)
+
+    def should_rotate(self):
+        if self.max_bytes and self.size >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.monotonic() - self.opened >= self.rotate_interval
+
+    def rotate(self):
+        """Archive the current file, the next write starts a new one."""
+        self.file.close()
+        self.file = None
+        self.archive(self.file_path)
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.compressor is not None:
+            self.compressor.wait()
 
     def rollback(self):
-        """Rollback the latest log file to a backup file with a timestamped filename."""
-        latest_log_file = self.find_latest_log_file()
-        if latest_log_file:
-            backup_file = self.create_backup_filename(latest_log_file)
-            shutil.move(latest_log_file, backup_file)
+        """Rollback the latest log files of previous sessions to backup files with timestamped filenames."""
+        while (latest_log_file := self.find_latest_log_file()) is not None:
+            self.archive(latest_log_file)
+        if self.compressor is None:
+            self.apply_retention()
+
+    def archive(self, log_file):
+        backup_file = self.create_backup_filename(log_file)
+        shutil.move(log_file, backup_file)
+        if self.compressor is not None:
+            self.compressor.submit(backup_file, self.apply_retention)
+        else:
+            self.apply_retention()
+
+    def apply_retention(self):
+        """Remove the oldest archives beyond the backup count, called on the compressor thread if compressing."""
+        if not self.backup_count:
+            return
+        archives = []
+        for file in os.listdir(self.log_dir):
+            if file.endswith(("_latest.log", ".tmp")):
+                continue
+            if file.endswith(".log") or any(file.endswith(".log" + suffix) for suffix in COMPRESSION_SUFFIXES.values()):
+                archives.append(os.path.join(self.log_dir, file))
+        # Compression rewrites the file, the name tells the age of an archive
+        archives.sort(key=_get_archive_age)
+        for path in archives[:-self.backup_count]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
     def find_latest_log_file(self):
-        """Find the latest log file in the root directory."""
-        for file in os.listdir('.'):
-            if file.endswith("_latest.log"):
-                return file
+        """Find a latest log file left by a previous session, earlier versions wrote them to the root directory."""
+        for directory in (self.log_dir, '.'):
+            for file in os.listdir(directory):
+                path = os.path.join(directory, file)
+                if file.endswith("_latest.log") and path != self.file_path:
+                    return path
         return None
 
     def create_backup_filename(self, log_file):
-        """Generate a backup filename with a timestamp."""
-        filename = f"{os.path.splitext(log_file)[0].split('_latest')[0]}.log"
-        return os.path.join(self.log_dir, filename)
+        """Generate a backup filename with a timestamp, unique if several files are rotated within a second."""
+        name = os.path.basename(log_file).split('_latest')[0]
+        filename = os.path.join(self.log_dir, f"{name}.log")
+        index = 1
+        while any(os.path.exists(filename + suffix) for suffix in ("", *COMPRESSION_SUFFIXES.values())):
+            filename = os.path.join(self.log_dir, f"{name}_{index}.log")
+            index += 1
+        return filename
+
+
+def _get_archive_age(path):
+    """Get a sort key ordering archives from oldest to newest by the session start in their name."""
+    match = ARCHIVE_NAME.match(os.path.basename(path))
+    if match is None:
+        # Not named by this sink, ordered before the named archives
+        return ("", 0, os.path.basename(path))
+    return (match.group(1), int(match.group(2) or 0), "")
@@ -1,9 +1,17 @@
-import asyncio
+import sys
+from metrics import StartupProfiler
+
+if "--profile-startup" in sys.argv:
+    # Installed before the remaining imports so they are timed as well
+    StartupProfiler().install()
+
+import argparse
 import customtkinter
 import frames
 from config import Config
 from event_bus import EventBus
 from logger import Logger, FileSink, ConsoleSink, LogLevel
+from metrics import Metrics, MetricsExporter
 import sercom
 import version as v
 
@@ -20,10 +28,18 @@ class App(customtkinter.CTk):
         self.event_bus = EventBus()
         self.m_config = Config()
         self.logger = Logger()
+        self.metrics = Metrics()
+        self.metrics_exporter = None
+        self.device_manager = None
+        self.profiler = StartupProfiler()
 
         self.m_config.set("version", value=f"{v.MAJOR}.{v.MINOR}.{v.PATCH}")
         self.initialize_interface()
+        self.initialize_metrics()
         self.logger.log(LogLevel.INFO, "Successfully started PyLevit")
+        if self.profiler.enabled:
+            self.profiler.mark("App.__init__")
+            self.after_idle(self.profile_startup)
 
     def initialize_interface(self):
         self.title(TITLE)
@@ -32,14 +48,44 @@ class App(customtkinter.CTk):
         self.center_window(WINDOW_WIDTH, WINDOW_HEIGHT)
         self.configure_layout()
         self.create_frames()
+        self.event_bus.attach_ui(self, self.m_config.get("event_bus", "ui_pump_interval") or 50)
 
     def initialize_logger(self):
+        self.logger.configure(
+            level=self.m_config.get("logger", "level") or None,
+            queue_size=self.m_config.get("logger", "queue_size") or None,
+            flush_interval=self.m_config.get("logger", "flush_interval") or None
+        )
         console_sink = ConsoleSink()
         self.logger.add_sink(console_sink)
 
-        file_sink = FileSink()
+        file_sink = FileSink(
+            self.m_config.get("logger", "log_dir") or "logs/",
+            max_bytes=self.m_config.get("logger", "max_bytes") or 0,
+            rotate_interval=self.m_config.get("logger", "rotate_interval") or 0,
+            backup_count=self.m_config.get("logger", "backup_count") or 0,
+            compression=self.m_config.get("logger", "compression") or None,
+            record_format=self.m_config.get("logger", "record_format") or "text"
+        )
         self.logger.add_sink(file_sink)
 
+    def initialize_metrics(self):
+        """Serve the metrics on localhost if an exporter port is configured."""
+        self.metrics.gauge("event_bus_dropped", "Events dropped or coalesced for queued subscribers", source=self.event_bus.dropped)
+        self.metrics.gauge("log_records_dropped", "Log records dropped because the log queue was full", source=lambda: self.logger.dropped)
+        self.metrics.gauge("log_queue_depth", "Log records waiting for the log writer", source=lambda: len(self.logger.records))
+        port = self.m_config.get("metrics", "exporter_port")
+        if not self.metrics.enabled or not port:
+            return
+
+        try:
+            self.metrics_exporter = MetricsExporter(port)
+            self.metrics_exporter.start()
+            self.logger.log(LogLevel.INFO, f"Serving metrics on http://127.0.0.1:{self.metrics_exporter.port}/metrics")
+        except OSError as e:
+            self.metrics_exporter = None
+            self.logger.log(LogLevel.WARNING, f"Could not start the metrics exporter: {e}")
+
     def center_window(self, width, height):
         screen_width = self.winfo_screenwidth()
         screen_height = self.winfo_screenheight()
@@ -55,21 +101,64 @@ class App(customtkinter.CTk):
         self.grid_rowconfigure(2, weight=0)
 
     def create_frames(self):
-        self.sidebar_frame = frames.SidebarFrame(self, width=140, corner_radius=0)
-        self.sidebar_frame.grid(row=0, column=0, rowspan=3, sticky="nsew")
-        self.plot_frame = frames.PlotFrame(self, fg_color="white")
-        self.plot_frame.grid(row=0, column=1, padx=(10, 5), pady=(10, 5), sticky="nsew")
-        self.settings_frame = frames.SettingsFrame(self)
-        self.settings_frame.grid(row=0, column=2, rowspan=2, padx=(5, 10), pady=(10, 5), sticky="nsew")
-        self.status_frame = frames.StatusBarFrame(self)
-        self.status_frame.grid(row=2, column=1, columnspan=2, padx=10, pady=(5, 10), sticky="nsew")
+        with self.profiler.section("SidebarFrame"):
+            self.sidebar_frame = frames.SidebarFrame(self, width=140, corner_radius=0)
+            self.sidebar_frame.grid(row=0, column=0, rowspan=3, sticky="nsew")
+        with self.profiler.section("PlotFrame"):
+            if self.m_config.get("devices", "sessions"):
+                # Rigs listed in the config are plotted side by side, connected once their plots listen for SERIAL_OPENED
+                self.device_manager = sercom.DeviceManager()
+                self.device_manager.add_configured()
+                self.plot_frame = frames.DevicePlotsFrame(self, self.device_manager)
+                self.device_manager.connect_configured()
+            else:
+                self.plot_frame = frames.PlotFrame(self, fg_color="white")
+            self.plot_frame.grid(row=0, column=1, padx=(10, 5), pady=(10, 5), sticky="nsew")
+        with self.profiler.section("SettingsFrame"):
+            self.settings_frame = frames.SettingsFrame(self)
+            self.settings_frame.grid(row=0, column=2, rowspan=2, padx=(5, 10), pady=(10, 5), sticky="nsew")
+        with self.profiler.section("StatusBarFrame"):
+            self.status_frame = frames.StatusBarFrame(self)
+            self.status_frame.grid(row=2, column=1, columnspan=2, padx=10, pady=(5, 10), sticky="nsew")
+
+    def profile_startup(self, window_shown=False):
+        """Print the startup profile once the window is shown and the plot has been built."""
+        if not window_shown:
+            self.profiler.mark("window shown")
+        if self.plot_frame.canvas is None:
+            self.after(20, self.profile_startup, True)
+            return
+        self.profiler.mark("plot ready")
+        self.profiler.uninstall()
+        print(self.profiler.report())
 
     def on_close(self):
-        asyncio.run(self.sercom.disconnect())
+        future = self.sercom.submit(self.sercom.disconnect())
         self.event_bus.publish("WM_DELETE_WINDOW")
-        self.after(1200, self.destroy())
+        self.wait_for_disconnect(future)
+
+    def wait_for_disconnect(self, future, retries=24):
+        """Destroy the window once the serial port has been closed."""
+        if not future.done() and retries > 0:
+            self.after(50, self.wait_for_disconnect, future, retries - 1)
+            return
+        self.sercom.shutdown()
+        if self.device_manager is not None:
+            self.device_manager.shutdown()
+        self.event_bus.detach_ui()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        dump_path = self.m_config.get("metrics", "dump_path")
+        if self.metrics.enabled and dump_path:
+            self.metrics.dump(dump_path)
+        self.logger.shutdown()
+        self.destroy()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PyLevit, monitor and tune a magnetic levitator.")
+    parser.add_argument("--profile-startup", action="store_true", help="print import and initialization timings once the window is shown")
+    parser.parse_args()
+
     app = App()
     app.mainloop()
@@ -0,0 +1,22 @@
+import importlib
+
+# Submodules are imported on first use, the startup profiler must be importable
+# before numpy and the exporter are loaded so it can time them
+_EXPORTS = {
+    "Metrics": "metrics.metrics",
+    "LatencyHistogram": "metrics.histogram",
+    "RateCounter": "metrics.counters",
+    "Gauge": "metrics.counters",
+    "MetricsExporter": "metrics.exporter",
+    "StartupProfiler": "metrics.startup",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,64 @@
+import time
+
+
+class RateCounter:
+    """Monotonic counter that also reports its rate over the last window."""
+    def __init__(self, name, description="", window=1.0):
+        self.name = name
+        self.description = description
+        self.window = window
+        self.total = 0
+        self.window_start = time.monotonic()
+        self.window_total = 0
+        self.last_rate = 0.0
+
+    def add(self, amount=1):
+        """Count events, only the thread owning the counter should add."""
+        self.total += amount
+
+    def rate(self):
+        """Get the events per second of the last complete window."""
+        now = time.monotonic()
+        elapsed = now - self.window_start
+        if elapsed >= self.window:
+            total = self.total
+            self.last_rate = (total - self.window_total) / elapsed
+            self.window_start = now
+            self.window_total = total
+        return self.last_rate
+
+    def snapshot(self):
+        return {"total": self.total, "rate": self.rate()}
+
+    def reset(self):
+        self.total = 0
+        self.window_start = time.monotonic()
+        self.window_total = 0
+        self.last_rate = 0.0
+
+
+class Gauge:
+    """Current value of a quantity, set directly or read from a callback."""
+    def __init__(self, name, description="", source=None):
+        self.name = name
+        self.description = description
+        self.source = source
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        """Get the current value."""
+        if self.source is not None:
+            try:
+                return self.source()
+            except Exception:
+                return self.value
+        return self.value
+
+    def snapshot(self):
+        return {"value": self.get()}
+
+    def reset(self):
+        self.value = 0.0
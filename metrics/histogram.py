@@ -0,0 +1,91 @@
+import math
+import numpy as np
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKETS = SUB_BUCKETS // 2
+# Values are stored in microseconds, 40 bits cover about twelve days
+MAX_VALUE_BITS = 40
+MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+BUCKET_COUNT = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1) * HALF_SUB_BUCKETS + HALF_SUB_BUCKETS
+RESOLUTION = 1e-6
+
+
+def bucket_index(value):
+    """Get the log-linear bucket of a value in microseconds."""
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return shift * HALF_SUB_BUCKETS + (value >> shift)
+
+
+def bucket_bounds(index):
+    """Get the lowest value and the width of a bucket."""
+    if index < SUB_BUCKETS:
+        return index, 1
+    shift = index // HALF_SUB_BUCKETS - 1
+    return (index - shift * HALF_SUB_BUCKETS) << shift, 1 << shift
+
+
+class LatencyHistogram:
+    """HDR-style latency histogram with about 3% relative precision.
+
+    Durations are recorded in seconds with microsecond resolution into
+    buckets that are linear within every power of two, so recording is
+    constant time and percentiles stay accurate from microseconds to hours.
+    """
+    def __init__(self, name, description=""):
+        self.name = name
+        self.description = description
+        # A plain list is several times faster than a numpy array for single increments
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Record a duration in seconds, only the thread owning the histogram should record."""
+        value = min(max(int(seconds / RESOLUTION), 0), MAX_VALUE)
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent, counts=None):
+        """Get the duration below which `percent` of the recorded values fall."""
+        cumulative = np.cumsum(self.counts if counts is None else counts)
+        if cumulative[-1] == 0:
+            return 0.0
+        index = int(np.searchsorted(cumulative, math.ceil(cumulative[-1] * percent / 100)))
+        lowest, width = bucket_bounds(index)
+        # The bucket midpoint can lie outside the exactly tracked extremes
+        return min(max((lowest + (width - 1) / 2) * RESOLUTION, self.min), self.max)
+
+    def mean(self):
+        """Get the mean duration."""
+        return self.total / self.count if self.count else 0.0
+
+    def snapshot(self, percentiles=(50, 90, 99, 99.9)):
+        """Summarize the histogram."""
+        counts = list(self.counts)
+        count, total, lowest, highest = self.count, self.total, self.min, self.max
+        return {
+            "count": count,
+            "sum": total,
+            "min": lowest if count else 0.0,
+            "max": highest,
+            "mean": total / count if count else 0.0,
+            "percentiles": {str(percent): self.percentile(percent, counts) for percent in percentiles},
+        }
+
+    def reset(self):
+        """Clear all recorded values."""
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from config import Config
+from metrics.counters import RateCounter, Gauge
+from metrics.histogram import LatencyHistogram
+
+PREFIX = "pylevit"
+
+
+class Metrics:
+    """Registry of the application's latency histograms, rate counters and gauges."""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.m_config = Config()
+            cls._instance.enabled = cls._instance.m_config.get("metrics", "enabled") is True
+            cls._instance.histograms = {}
+            cls._instance.counters = {}
+            cls._instance.gauges = {}
+            cls._instance.started = time.time()
+        return cls._instance
+
+    def histogram(self, name, description=""):
+        """Get or create a latency histogram."""
+        if name not in self.histograms:
+            self.histograms[name] = LatencyHistogram(name, description)
+        return self.histograms[name]
+
+    def counter(self, name, description=""):
+        """Get or create a rate counter."""
+        if name not in self.counters:
+            self.counters[name] = RateCounter(name, description)
+        return self.counters[name]
+
+    def gauge(self, name, description="", source=None):
+        """Get or create a gauge, a source callback replaces the stored value."""
+        if name not in self.gauges:
+            self.gauges[name] = Gauge(name, description, source)
+        elif source is not None:
+            self.gauges[name].source = source
+        return self.gauges[name]
+
+    def snapshot(self):
+        """Get the current value of every metric."""
+        return {
+            "timestamp": time.time(),
+            "uptime": time.time() - self.started,
+            "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            "counters": {name: counter.snapshot() for name, counter in self.counters.items()},
+            "gauges": {name: gauge.snapshot() for name, gauge in self.gauges.items()},
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=4)
+
+    def dump(self, path):
+        """Write a snapshot of all metrics to a JSON file."""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    def to_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, histogram in self.histograms.items():
+            snapshot = histogram.snapshot()
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {histogram.description or name}")
+            lines.append(f"# TYPE {metric} summary")
+            for percent, value in snapshot["percentiles"].items():
+                lines.append(f'{metric}{{quantile="{float(percent) / 100:g}"}} {value:.9g}')
+            lines.append(f"{metric}_sum {snapshot['sum']:.9g}")
+            lines.append(f"{metric}_count {snapshot['count']}")
+        for name, counter in self.counters.items():
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {counter.description or name}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {counter.total}")
+        for name, gauge in self.gauges.items():
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {gauge.description or name}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {gauge.get():.9g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Reset every metric."""
+        for metric in (*self.histograms.values(), *self.counters.values(), *self.gauges.values()):
+            metric.reset()
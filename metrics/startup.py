@@ -0,0 +1,93 @@
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Measures import and initialization times until the application is ready.
+
+    Once installed, every import that loads a new module is timed. Its own
+    time, without the modules it imports in turn, is attributed to its
+    top-level package. Sections time the initialization of frames and other
+    steps.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.enabled = False
+            cls._instance.started = time.perf_counter()
+            cls._instance.imports = {}
+            cls._instance.sections = []
+            cls._instance.marks = []
+            cls._instance.children = []
+            cls._instance.original_import = None
+        return cls._instance
+
+    def install(self):
+        """Start timing imports."""
+        if self.original_import is not None:
+            return
+        self.enabled = True
+        self.started = time.perf_counter()
+        self.original_import = builtins.__import__
+        builtins.__import__ = self.timed_import
+
+    def uninstall(self):
+        """Stop timing imports."""
+        if self.original_import is not None:
+            builtins.__import__ = self.original_import
+            self.original_import = None
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+
+        self.children.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            own = elapsed - self.children.pop()
+            if self.children:
+                self.children[-1] += elapsed
+            if level:
+                package = (globals or {}).get("__package__") or ""
+            else:
+                package = name
+            package = package.partition(".")[0] or "__main__"
+            self.imports[package] = self.imports.get(package, 0.0) + own
+
+    @contextmanager
+    def section(self, name):
+        """Time a step of the startup."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append((name, time.perf_counter() - started))
+
+    def mark(self, name):
+        """Record the time since the start, e.g. when the window is shown."""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.started))
+
+    def report(self, limit=15):
+        """Get a text report of the slowest imports, the sections and the marks."""
+        lines = ["Imports (own time by package):"]
+        for package, seconds in sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            lines.append(f"  {package:<24} {seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<24} {sum(self.imports.values()) * 1000:8.1f} ms")
+        lines.append("Initialization:")
+        for name, seconds in self.sections:
+            lines.append(f"  {name:<24} {seconds * 1000:8.1f} ms")
+        lines.append("Since start:")
+        for name, seconds in self.marks:
+            lines.append(f"  {name:<24} {seconds * 1000:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,3 @@
+from plotting.smoothing import CatmullRomSmoother
+from plotting.decimation import MinMaxPyramid
+from plotting.scheduler import RenderScheduler, AxisHysteresis
@@ -0,0 +1,76 @@
+import math
+import numpy as np
+
+
+class MinMaxPyramid:
+    """Incremental min/max envelope of a TelemetryRing at power-of-two bucket sizes.
+
+    Level `L` stores one (x, min, max) bucket per `2**L` samples, addressed by
+    the absolute sample index of the ring. Appending samples only recomputes
+    the buckets they fall into, and a view is decimated by picking the level
+    whose bucket size best matches the number of pixels available.
+    """
+    def __init__(self, history, min_buckets=256):
+        self.history = history
+        self.levels = []
+        level = 1
+        while history.capacity >> level >= min_buckets:
+            size = (history.capacity >> level) + 2
+            self.levels.append((
+                np.zeros(size, dtype=np.float64),
+                np.zeros(size, dtype=np.float32),
+                np.zeros(size, dtype=np.float32),
+            ))
+            level += 1
+
+    def update(self, start, count):
+        """Recompute the buckets covering samples `start` to `start + count`."""
+        if count <= 0 or not self.levels:
+            return
+
+        head = self.history.head
+        capacity = self.history.capacity
+        child_x = self.history.timestamps
+        child_min = child_max = self.history.values
+        child_size = capacity
+        last_child = head - 1
+
+        for level, (x, low, high) in enumerate(self.levels, start=1):
+            first = start >> level
+            last = (start + count - 1) >> level
+            buckets = np.arange(first, last + 1)
+            left = (2 * buckets) % child_size
+            right = np.minimum(2 * buckets + 1, last_child) % child_size
+
+            size = len(x)
+            slots = buckets % size
+            x[slots] = child_x[left]
+            low[slots] = np.minimum(child_min[left], child_min[right])
+            high[slots] = np.maximum(child_max[left], child_max[right])
+
+            child_x, child_min, child_max, child_size = x, low, high, size
+            last_child = (head - 1) >> level
+
+    def query(self, x_min, x_max, max_points):
+        """Get the samples between two x positions, decimated to about `max_points` points.
+
+        Returns the x and y data and the level used, level 0 means raw samples.
+        """
+        timestamps, _, values = self.history.latest()
+        first = int(np.searchsorted(timestamps, x_min, side="left"))
+        last = int(np.searchsorted(timestamps, x_max, side="right"))
+        # Include one sample on each side so lines reach the edges of the view
+        first = max(first - 1, 0)
+        last = min(last + 1, len(timestamps))
+        count = last - first
+
+        if count <= max_points or not self.levels:
+            return timestamps[first:last], values[first:last], 0
+
+        level = min(math.ceil(math.log2(count * 2 / max_points)), len(self.levels))
+        x, low, high = self.levels[level - 1]
+        offset = self.history.head - len(timestamps)
+        buckets = np.arange((offset + first) >> level, ((offset + last - 1) >> level) + 1) % len(x)
+
+        # Two points per bucket, the envelope keeps spikes visible at any zoom level
+        return np.repeat(x[buckets], 2), np.column_stack((low[buckets], high[buckets])).ravel(), level
@@ -0,0 +1,73 @@
+import time
+
+
+class RenderScheduler:
+    """Adapt the render interval to the measured draw cost and main loop lag."""
+    def __init__(self, min_interval=0.02, max_interval=0.25, budget=0.4, smoothing=0.2):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = budget
+        self.smoothing = smoothing
+        self.interval = min_interval
+        self.draw_cost = 0.0
+        self.lag = 0.0
+        self.expected = None
+
+    def tick_started(self, now=None):
+        """Record how late the tick fired compared to when it was scheduled."""
+        now = time.perf_counter() if now is None else now
+        if self.expected is not None:
+            self.lag += self.smoothing * (max(now - self.expected, 0.0) - self.lag)
+        return now
+
+    def tick_finished(self, started, now=None):
+        """Record the draw cost of a tick and compute the delay until the next one."""
+        now = time.perf_counter() if now is None else now
+        self.draw_cost += self.smoothing * (now - started - self.draw_cost)
+
+        # Keep drawing below the budget share of the main loop and back off while it lags
+        target = max(self.min_interval, self.draw_cost / self.budget)
+        if self.lag > self.interval / 2:
+            target = max(target, self.interval * 1.25)
+        self.interval = min(max(target, self.interval * 0.9), self.max_interval)
+
+        self.expected = now + self.interval
+        return self.interval
+
+    def frame_rate(self):
+        """Get the current target frame rate."""
+        return 1 / self.interval
+
+    def reset(self):
+        """Forget the measurements."""
+        self.interval = self.min_interval
+        self.draw_cost = 0.0
+        self.lag = 0.0
+        self.expected = None
+
+
+class AxisHysteresis:
+    """Decide when axis limits must change so full redraws stay rare.
+
+    Limits are padded by `margin` on both sides and `lead` on the upper side,
+    and only change when the data leaves them or they become much too loose.
+    """
+    def __init__(self, margin=0.0, lead=0.0, slack=1.5):
+        self.margin = margin
+        self.lead = lead
+        self.slack = slack
+
+    def propose(self, current, low, high):
+        """Get new limits for the data range, or None if the current ones still fit."""
+        span = high - low
+        if span <= 0:
+            return None
+
+        padded = span * (1 + 2 * self.margin + self.lead)
+        current_low, current_high = current
+        fits = current_low <= low and high <= current_high
+        too_loose = current_high - current_low > padded * self.slack
+        if fits and not too_loose:
+            return None
+
+        return low - span * self.margin, high + span * (self.margin + self.lead)
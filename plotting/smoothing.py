@@ -0,0 +1,44 @@
+import numpy as np
+from sercom.telemetry_ring import TelemetryRing
+
+
+class CatmullRomSmoother:
+    """Incremental Catmull-Rom upsampling of a live trace.
+
+    Each segment only depends on its four surrounding samples, so new samples
+    extend the smoothed curve without touching what has already been computed.
+    The curve lags the raw trace by two samples.
+    """
+    def __init__(self, capacity, factor=4):
+        self.factor = factor
+        self.steps = np.arange(factor) / factor
+        self.output = TelemetryRing(capacity * factor)
+        self.tail_x = np.empty(0, dtype=np.float64)
+        self.tail_y = np.empty(0, dtype=np.float32)
+
+    def update(self, x, y):
+        """Smooth the segments completed by newly arrived samples."""
+        x = np.concatenate((self.tail_x, x))
+        y = np.concatenate((self.tail_y, y))
+        if len(x) < 4:
+            self.tail_x, self.tail_y = x, y
+            return
+
+        p0, p1, p2, p3 = y[:-3, None], y[1:-2, None], y[2:-1, None], y[3:, None]
+        t = self.steps
+        smooth_y = 0.5 * (2 * p1 + (p2 - p0) * t + (2 * p0 - 5 * p1 + 4 * p2 - p3) * t ** 2 + (3 * p1 - p0 - 3 * p2 + p3) * t ** 3)
+        smooth_x = x[1:-2, None] + (x[2:-1, None] - x[1:-2, None]) * t
+
+        self.output.write(smooth_x.ravel(), np.zeros(smooth_x.size, dtype=np.uint8), smooth_y.ravel())
+        self.tail_x, self.tail_y = x[-3:], y[-3:]
+
+    def latest(self, count=None):
+        """Get views of the most recent smoothed points."""
+        x, _, y = self.output.latest(count)
+        return x, y
+
+    def reset(self):
+        """Drop the smoothed curve."""
+        self.output.head = 0
+        self.tail_x = self.tail_x[:0]
+        self.tail_y = self.tail_y[:0]
@@ -0,0 +1,28 @@
+import argparse
+import sys
+from config import Config
+from pylevit.headless import PARAMETERS, HeadlessCapture, get_configured_parameters
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pylevit", description="Capture levitator telemetry without the GUI.")
+    parser.add_argument("port", help="serial port, replay:// url or simulator pty")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("-o", "--output", help="record every frame to this .rec file")
+    parser.add_argument("--stdout", action="store_true", help="write hall and PWM samples to stdout as CSV")
+    parser.add_argument("--stats-interval", type=float, default=None, help="seconds between throughput statistics, 0 to disable")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    for name in PARAMETERS:
+        parser.add_argument(f"--{name}", type=float, default=None, help=f"{name} applied on connect")
+    args = parser.parse_args()
+
+    parameters = get_configured_parameters()
+    parameters.update({name: getattr(args, name) for name in PARAMETERS if getattr(args, name) is not None})
+    stats_interval = args.stats_interval if args.stats_interval is not None else Config().get("headless", "stats_interval") or 5.0
+
+    capture = HeadlessCapture(args.port, args.baud, args.output, args.stdout, stats_interval, parameters)
+    sys.exit(capture.run(args.duration))
+
+
+if __name__ == "__main__":
+    main()
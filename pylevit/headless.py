@@ -0,0 +1,113 @@
+import sys
+import time
+import numpy as np
+import serial
+from config import Config
+from event_bus import EventBus, Event
+from metrics import Metrics
+import sercom
+from sercom.fastprotoc import PacketType
+
+PARAMETERS = {
+    "setpoint": PacketType.SETPOINT_UPDATE.value,
+    "kp": PacketType.KP_UPDATE.value,
+    "ki": PacketType.KI_UPDATE.value,
+    "kd": PacketType.KD_UPDATE.value,
+}
+
+
+class HeadlessCapture:
+    """Captures telemetry without the GUI, for long soak runs.
+
+    Hall and PWM samples are read from a TelemetryRing and optionally written
+    to stdout as CSV, every frame can be recorded to disk with the regular
+    recorder. Throughput statistics are printed to stderr periodically.
+    """
+    def __init__(self, port, baud=115200, output=None, stdout=False, stats_interval=5.0, parameters=None, ring_size=1 << 20):
+        self.port = port
+        self.baud = baud
+        self.output = output
+        self.stdout = stdout
+        self.stats_interval = stats_interval
+        self.parameters = parameters or {}
+        self.sercom = sercom.Sercom()
+        self.metrics = Metrics()
+        self.telemetry = sercom.TelemetryRing(ring_size)
+        self.cursor = 0
+        self.samples = 0
+        self.dropped = 0
+        self.closed = False
+        self.recorder = None
+
+    def run(self, duration=None):
+        """Capture until interrupted, the device disconnects or `duration` seconds have passed.
+
+        Returns the exit status, non-zero if the port could not be opened.
+        """
+        self.sercom.add_telemetry_ring(self.telemetry, (PacketType.HALL_UPDATE.value, PacketType.PWM_UPDATE.value))
+        EventBus().subscribe(Event.SERIAL_CLOSED.value, self.serial_closed_callback)
+        for name, identifier in PARAMETERS.items():
+            EventBus().subscribe(identifier, self.parameter_callback(name))
+
+        started = last_stats = time.monotonic()
+        stats_samples = 0
+        try:
+            # An output file given on the command line wins over recorder.enabled
+            record = True if self.output is not None else None
+            try:
+                self.sercom.submit(self.sercom.connect(self.port, self.baud, record, self.output)).result()
+            except (serial.SerialException, OSError, ValueError) as e:
+                print(f"Could not open {self.port}: {e}", file=sys.stderr)
+                return 1
+            print(f"Connected to {self.port} at {self.baud} baud", file=sys.stderr)
+            if self.sercom.recorders:
+                self.recorder = self.sercom.recorders[0]
+                print(f"Recording to {self.recorder.path}", file=sys.stderr)
+            for name, value in self.parameters.items():
+                self.sercom.set_parameter(PARAMETERS[name], float(value))
+
+            while not self.closed and (duration is None or time.monotonic() - started < duration):
+                time.sleep(0.05)
+                self.read_telemetry()
+                now = time.monotonic()
+                if self.stats_interval and now - last_stats >= self.stats_interval:
+                    self.print_stats((self.samples - stats_samples) / (now - last_stats))
+                    last_stats, stats_samples = now, self.samples
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.sercom.submit(self.sercom.disconnect()).result(timeout=5)
+            self.read_telemetry()
+            self.sercom.shutdown()
+        print(f"Captured {self.samples} samples in {time.monotonic() - started:.1f} s, {self.dropped} dropped", file=sys.stderr)
+        return 0
+
+    def read_telemetry(self):
+        self.cursor, timestamps, identifiers, values, dropped = self.telemetry.read_since(self.cursor)
+        self.samples += len(values)
+        self.dropped += dropped
+        if self.stdout and len(values):
+            rows = np.column_stack((timestamps, identifiers, values))
+            np.savetxt(sys.stdout, rows, fmt=("%.6f", "%d", "%g"), delimiter=",")
+
+    def print_stats(self, sample_rate):
+        frames = self.metrics.counter("serial_frames")
+        received = self.metrics.counter("serial_bytes")
+        bad_frames = self.metrics.counter("serial_bad_frames")
+        recorded = f", {self.recorder.count} recorded" if self.recorder is not None else ""
+        print(f"{sample_rate:.0f} samples/s, {frames.rate():.0f} frames/s, {received.rate() / 1024:.1f} KiB/s, "
+              f"{bad_frames.total} bad frames, {self.dropped} dropped{recorded}", file=sys.stderr)
+
+    def parameter_callback(self, name):
+        def callback(event_data=None):
+            print(f"Device confirmed {name} = {event_data:g}", file=sys.stderr)
+        return callback
+
+    def serial_closed_callback(self, event_data=None):
+        self.closed = True
+
+
+def get_configured_parameters():
+    """Get the parameters to apply on connect from the headless section of the config."""
+    parameters = Config().get("headless", "parameters") or {}
+    return {name: value for name, value in parameters.items() if name in PARAMETERS and value is not None}
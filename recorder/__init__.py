@@ -0,0 +1 @@
+from recorder.recorder import TelemetryRecorder, read_recording, RECORD_DTYPE
@@ -0,0 +1,131 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import numpy as np
+
+MAGIC = b"PYLVREC\0"
+VERSION = 1
+HEADER_SIZE = 4096
+HEADER_FORMAT = "<8sIIIIQQdd"
+COUNT_OFFSET = struct.calcsize("<8sIIII")
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("identifier", "<u4"),
+    ("value", "<f4"),
+])
+
+
+class TelemetryRecorder:
+    """Append fixed-size telemetry records to a memory-mapped file.
+
+    The file starts with a header holding the record schema, a config
+    snapshot and the number of valid records. The count is only updated after
+    the records have been written, so other processes can read a recording
+    while it grows.
+    """
+    def __init__(self, path, metadata=None, chunk_records=65536):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.capacity = 0
+        self.count = 0
+        self.file = None
+        self.map = None
+        self.records = None
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.file = open(path, "w+b")
+        self.write_header(metadata or {})
+        self.grow()
+
+    def write_header(self, metadata):
+        """Write the header describing the record layout."""
+        info = json.dumps({
+            "schema": [(name, RECORD_DTYPE[name].str) for name in RECORD_DTYPE.names],
+            "metadata": metadata,
+        }).encode("utf-8")
+        fixed = struct.pack(HEADER_FORMAT, MAGIC, VERSION, HEADER_SIZE, RECORD_DTYPE.itemsize, len(info), 0, 0, time.time(), time.time() - time.monotonic())
+        if len(fixed) + len(info) > HEADER_SIZE:
+            raise ValueError("Recording metadata does not fit into the header")
+        self.file.write(fixed + info + bytes(HEADER_SIZE - len(fixed) - len(info)))
+        self.file.flush()
+
+    def grow(self):
+        """Extend the file by one chunk and map it again."""
+        self.records = None
+        if self.map is not None:
+            self.map.close()
+
+        self.capacity += self.chunk_records
+        self.file.truncate(HEADER_SIZE + self.capacity * RECORD_DTYPE.itemsize)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.records = np.frombuffer(self.map, dtype=RECORD_DTYPE, count=self.capacity, offset=HEADER_SIZE)
+        struct.pack_into("<Q", self.map, COUNT_OFFSET + 8, self.capacity)
+
+    def append(self, timestamps, identifiers, values):
+        """Append a batch of records, timestamps are time.monotonic() values."""
+        count = len(values)
+        if count == 0:
+            return
+
+        with self._lock:
+            if self.map is None:
+                return
+            while self.count + count > self.capacity:
+                self.grow()
+
+            block = self.records[self.count:self.count + count]
+            block["timestamp"] = timestamps
+            block["identifier"] = identifiers
+            block["value"] = values
+            self.count += count
+            # Publish the records only after they have been written
+            struct.pack_into("<Q", self.map, COUNT_OFFSET, self.count)
+
+    def close(self):
+        """Trim the file to the recorded size and close it."""
+        with self._lock:
+            if self.map is None:
+                return
+            self.records = None
+            self.map.flush()
+            self.map.close()
+            self.map = None
+            self.file.truncate(HEADER_SIZE + self.count * RECORD_DTYPE.itemsize)
+            self.file.seek(COUNT_OFFSET + 8)
+            self.file.write(struct.pack("<Q", self.count))
+            self.file.close()
+
+
+def read_recording(path):
+    """Read a recording, also while it is still being written.
+
+    Returns the header as a dict and a read-only array of the valid records.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        magic, version, header_size, record_size, info_size, count, capacity, created, clock_offset = struct.unpack_from(HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise ValueError("Not a PyLevit recording")
+        if record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Unsupported record size {record_size}")
+
+        info_offset = struct.calcsize(HEADER_FORMAT)
+        info = json.loads(header[info_offset:info_offset + info_size].decode("utf-8"))
+        f.seek(header_size)
+        records = np.frombuffer(f.read(count * record_size), dtype=RECORD_DTYPE)
+
+    return {
+        "version": version,
+        "count": count,
+        "created": created,
+        "clock_offset": clock_offset,
+        "schema": info["schema"],
+        "metadata": info["metadata"],
+    }, records
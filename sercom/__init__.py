@@ -1,2 +1,4 @@
-from sercom.sercom import Sercom
+from sercom.sercom import Sercom, SerialSession
+from sercom.device_manager import DeviceManager
+from sercom.telemetry_ring import TelemetryRing
 from sercom.util import get_available_ports
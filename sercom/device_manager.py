@@ -0,0 +1,91 @@
+import asyncio
+import concurrent.futures
+from config import Config
+from sercom.event_loop import EventLoopThread
+from sercom.multiplexer import SerialMultiplexer
+from sercom.sercom import SerialSession
+
+READER_THREADS = "thread"
+READER_SELECTOR = "selector"
+
+
+class DeviceManager:
+    """Holds the sessions of several devices connected at the same time.
+
+    All sessions share one event loop thread. With the "selector" reader the
+    ports of all sessions are serviced by a single SerialMultiplexer thread,
+    with the "thread" reader every session starts its own reader as
+    configured in serial.reader_mode.
+    """
+    def __init__(self, reader=None):
+        self.m_config = Config()
+        self.reader = reader or self.m_config.get("devices", "reader") or READER_SELECTOR
+        self.loop_thread = EventLoopThread()
+        self.loop_thread.start()
+        self.multiplexer = SerialMultiplexer() if self.reader == READER_SELECTOR else None
+        self.sessions = {}
+
+    def add(self, name):
+        """Create a session, its events are published on topics namespaced with `name`."""
+        if name in self.sessions:
+            raise ValueError(f"A session named {name} already exists")
+        session = SerialSession(name, self.loop_thread, self.multiplexer)
+        self.sessions[name] = session
+        return session
+
+    def get(self, name):
+        return self.sessions[name]
+
+    def remove(self, name):
+        """Disconnect and remove a session."""
+        session = self.sessions.pop(name)
+        return session.submit(session.disconnect())
+
+    def connect(self, name, port, baud=115200):
+        """Connect a session, creating it if needed, returns a future."""
+        session = self.sessions.get(name) or self.add(name)
+        return session.submit(session.connect(port, baud))
+
+    def add_configured(self):
+        """Create the sessions listed in devices.sessions without connecting them."""
+        for device in self.m_config.get("devices", "sessions") or []:
+            if device["name"] not in self.sessions:
+                self.add(device["name"])
+        return self.sessions
+
+    def connect_configured(self):
+        """Connect the sessions listed in devices.sessions, returns their futures by name."""
+        futures = {}
+        for device in self.m_config.get("devices", "sessions") or []:
+            future = self.connect(device["name"], device["port"], device.get("baud", 115200))
+            future.add_done_callback(lambda future, name=device["name"]: self.report_connect_error(name, future))
+            futures[device["name"]] = future
+        return futures
+
+    @staticmethod
+    def report_connect_error(name, future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Failed to connect {name}: {future.exception()}")
+
+    def disconnect_all(self):
+        """Disconnect all sessions, returns a future completing when all are closed."""
+        futures = [session.submit(session.disconnect()) for session in self.sessions.values()]
+        return self.loop_thread.submit(self._wait_all(futures))
+
+    @staticmethod
+    async def _wait_all(futures):
+        for future in futures:
+            try:
+                await asyncio.wrap_future(future)
+            except Exception as e:
+                print(f"An error occurred while disconnecting: {e}")
+
+    def shutdown(self, timeout=5.0):
+        """Disconnect all sessions and stop the threads."""
+        try:
+            self.disconnect_all().result(timeout)
+        except concurrent.futures.TimeoutError:
+            print("Timed out disconnecting the devices")
+        if self.multiplexer is not None:
+            self.multiplexer.stop()
+        self.loop_thread.shutdown()
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+
+class EventLoopThread(threading.Thread):
+    """Thread running a long-lived asyncio event loop."""
+    def __init__(self):
+        super().__init__(name="sercom-event-loop", daemon=True)
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+
+    def run(self):
+        """Run the event loop until it is stopped."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def start(self):
+        """Start the thread and wait until the loop is running."""
+        super().start()
+        self._ready.wait()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop, returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback, *args):
+        """Schedule a callback on the loop from any thread."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def in_loop(self):
+        """Check if the caller is running inside this loop."""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def shutdown(self):
+        """Stop the event loop."""
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
@@ -1,5 +1,7 @@
 import struct
+from collections import namedtuple
 from enum import Enum, auto
+import numpy as np
 
 
 class PacketType(Enum):
@@ -15,11 +17,21 @@ PACKET_FORMAT = "<BBBfB"
 START_DELIMITER = b"{"
 END_DELIMITER = b"}"
 SEPARATOR = b":"
+PACKET_SIZE = struct.calcsize(PACKET_FORMAT)
+PACKET_DTYPE = np.dtype([
+    ("start", "u1"),
+    ("identifier", "u1"),
+    ("separator", "u1"),
+    ("value", "<f4"),
+    ("end", "u1"),
+])
+
+DecodeResult = namedtuple("DecodeResult", ["identifiers", "values", "offsets", "rejects", "consumed"])
 
 def decode_packet(packet):
     """Decode packet from byte string."""
     try:
-        if len(packet) != struct.calcsize(PACKET_FORMAT):
+        if len(packet) != PACKET_SIZE:
             raise ValueError("Invalid packet length")
 
         _, identifier, _, data, _ = struct.unpack(PACKET_FORMAT, packet)
@@ -28,6 +40,64 @@ def decode_packet(packet):
         print(f"Error occurred while decoding packet: {e}")
         return None, None
 
+def _find_frames(raw):
+    """Find start offsets of all non-overlapping frames in a byte array."""
+    if len(raw) < PACKET_SIZE:
+        return np.empty(0, dtype=np.intp)
+
+    last = len(raw) - PACKET_SIZE + 1
+    mask = raw[:last] == ord(START_DELIMITER)
+    mask &= raw[2:last + 2] == ord(SEPARATOR)
+    mask &= raw[PACKET_SIZE - 1:] == ord(END_DELIMITER)
+    starts = np.flatnonzero(mask)
+
+    if len(starts) > 1 and np.any(np.diff(starts) < PACKET_SIZE):
+        # Overlapping candidates only occur in corrupted streams, resolve them greedily
+        accepted = []
+        next_free = 0
+        for start in starts.tolist():
+            if start >= next_free:
+                accepted.append(start)
+                next_free = start + PACKET_SIZE
+        starts = np.array(accepted, dtype=np.intp)
+    return starts
+
+def decode_many(buffer):
+    """Decode every frame contained in a chunk of bytes.
+
+    Returns the identifiers, values and byte offsets of all valid frames, the
+    byte offsets of rejected (garbage) runs and the number of bytes consumed. Bytes after
+    `consumed` may be the beginning of an incomplete frame and should be
+    prepended to the next chunk.
+    """
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    starts = _find_frames(raw)
+
+    frames = raw[starts[:, None] + np.arange(PACKET_SIZE)].view(PACKET_DTYPE).ravel()
+    identifiers = frames["identifier"]
+    values = frames["value"]
+
+    # Keep a trailing partial frame for the next chunk
+    tail_start = max(len(raw) - PACKET_SIZE + 1, int(starts[-1]) + PACKET_SIZE if len(starts) else 0, 0)
+    tail_delimiters = np.flatnonzero(raw[tail_start:] == ord(START_DELIMITER))
+    consumed = tail_start + int(tail_delimiters[0]) if len(tail_delimiters) else len(raw)
+
+    covered = np.zeros(consumed, dtype=bool)
+    covered[(starts[:, None] + np.arange(PACKET_SIZE)).ravel()] = True
+    rejects = np.flatnonzero(~covered & np.r_[True, covered[:-1]][:consumed])
+
+    return DecodeResult(identifiers, values, starts, rejects, consumed)
+
+def encode_many(identifiers, values):
+    """Encode arrays of identifiers and values into a structured array of frames."""
+    frames = np.empty(len(identifiers), dtype=PACKET_DTYPE)
+    frames["start"] = ord(START_DELIMITER)
+    frames["identifier"] = identifiers
+    frames["separator"] = ord(SEPARATOR)
+    frames["value"] = values
+    frames["end"] = ord(END_DELIMITER)
+    return frames
+
 def send(serial, identifier, data):
     """Send packet to serial port."""
     try:
@@ -46,11 +116,12 @@ def receive(serial):
         if start_delimiter != START_DELIMITER:
             return None, None
         
-        packet_data = serial.read_until(END_DELIMITER)
+        # Read by length, the float payload may legally contain the end delimiter
+        packet_data = serial.read(PACKET_SIZE - 1)
         packet = start_delimiter + packet_data
         end_delimiter = packet_data[-1:]
         
-        if end_delimiter != END_DELIMITER:
+        if len(packet) != PACKET_SIZE or end_delimiter != END_DELIMITER:
             return None, None
         
         decoded_packet = decode_packet(packet)
@@ -0,0 +1,161 @@
+import os
+import selectors
+import threading
+import time
+from collections import deque
+from sercom.fastprotoc import PacketType
+from sercom.packet_handler import PacketHandler
+
+
+class MultiplexedHandler(PacketHandler):
+    """Packet handling of one port serviced by a SerialMultiplexer."""
+    def __init__(self, serial, setter_table, telemetry_rings, sample_stream=None, recorders=(), namespace=None):
+        super().__init__(serial, setter_table, telemetry_rings, sample_stream, recorders, namespace)
+        self.closed = False
+        self.removed = threading.Event()
+        # Kept from registration, the port may already be closed when it is unregistered
+        self.fd = None
+
+    def stop(self):
+        """Stop handling packets, the multiplexer unregisters the port on its next pass."""
+        if self.closed:
+            return
+        self.closed = True
+        super().stop()
+
+
+class SerialMultiplexer(threading.Thread):
+    """Services the serial ports of several sessions from a single thread.
+
+    Ports are waited on with a selector, so an idle port costs nothing and one
+    thread can keep up with many devices. Timeouts and rate-limited setter
+    updates are handled on the same thread.
+    """
+    def __init__(self):
+        super().__init__(name="serial-multiplexer", daemon=True)
+        self.selector = selectors.DefaultSelector()
+        self.handlers = []
+        self.changes = deque()
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        self.selector.register(self._wakeup_read, selectors.EVENT_READ, None)
+
+    def add(self, handler):
+        """Start servicing the port of a handler."""
+        with self._start_lock:
+            if not self.is_alive():
+                self.start()
+        self.changes.append((True, handler))
+        self.wakeup()
+
+    def remove(self, handler, timeout=1.0):
+        """Stop servicing a port, returns once the port is no longer read."""
+        handler.stop()
+        if not self.is_alive():
+            return
+        self.changes.append((False, handler))
+        self.wakeup()
+        handler.removed.wait(timeout)
+
+    def wakeup(self):
+        """Wake the thread to apply changes or send pending parameter updates."""
+        try:
+            os.write(self._wakeup_write, b"\0")
+        except OSError:
+            pass
+
+    def stop(self):
+        self._stop_event.set()
+        self.wakeup()
+
+    def apply_changes(self):
+        while self.changes:
+            added, handler = self.changes.popleft()
+            if added and not handler.closed:
+                try:
+                    handler.fd = handler.serial.fileno()
+                    self.selector.register(handler.fd, selectors.EVENT_READ, handler)
+                except Exception as e:
+                    print(f"Failed to watch {self.describe(handler)}: {e}")
+                    handler.stop()
+                    handler.removed.set()
+                    continue
+                self.handlers.append(handler)
+            elif not added:
+                self.unregister(handler)
+
+    def unregister(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+            try:
+                self.selector.unregister(handler.fd)
+            except (KeyError, ValueError, OSError):
+                pass
+        handler.removed.set()
+
+    def drop_closed_ports(self):
+        """Stop handling ports whose file descriptor was closed behind the multiplexer's back."""
+        for handler in list(self.handlers):
+            try:
+                os.fstat(handler.fd)
+            except OSError:
+                print(f"{self.describe(handler)} was closed while being read")
+                handler.stop()
+                self.unregister(handler)
+
+    @staticmethod
+    def describe(handler):
+        return getattr(handler.serial, "port", None) or handler.namespace
+
+    def get_timeout(self):
+        """Get the time until the next receive timeout or rate-limited setter update is due."""
+        deadline = time.monotonic() + 1.0
+        for handler in self.handlers:
+            deadline = min(deadline, handler.last_received + handler.timeout_seconds)
+            if handler.setter_table.pending() and handler.next_setter_due is not None:
+                deadline = min(deadline, handler.next_setter_due)
+        return max(deadline - time.monotonic(), 0)
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                self.apply_changes()
+                try:
+                    ready = self.selector.select(self.get_timeout())
+                except (OSError, ValueError):
+                    self.drop_closed_ports()
+                    continue
+                for key, _ in ready:
+                    handler = key.data
+                    if handler is None:
+                        try:
+                            while os.read(self._wakeup_read, 512):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    elif not handler.closed:
+                        try:
+                            handler.handle_chunk()
+                        except Exception as e:
+                            print(f"Error occurred while reading from {self.describe(handler)}: {e}")
+                            handler.stop()
+
+                for handler in list(self.handlers):
+                    if not handler.closed:
+                        try:
+                            handler.flush_setters()
+                            handler.process_received_packet(PacketType.WRONG_DEVICE.value, None)
+                        except Exception as e:
+                            print(f"Error occurred while writing to {self.describe(handler)}: {e}")
+                            handler.stop()
+                    if handler.closed:
+                        self.unregister(handler)
+        finally:
+            for handler in list(self.handlers):
+                self.unregister(handler)
+            self.selector.close()
+            os.close(self._wakeup_read)
+            os.close(self._wakeup_write)
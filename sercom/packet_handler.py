@@ -0,0 +1,173 @@
+import time
+import numpy as np
+from sercom.fastprotoc import PacketType
+from config import Config
+from event_bus import EventBus, Event, namespaced
+from metrics import Metrics
+import sercom.fastprotoc as pkt
+from sercom.parser import StreamParser
+
+
+class PacketHandler:
+    """Shared packet handling for the serial readers."""
+    def __init__(self, serial, setter_table, telemetry_rings, sample_stream=None, recorders=(), namespace=None):
+        self.serial = serial
+        self.namespace = namespace
+        self.packet_loss = 0
+        self.last_received = time.monotonic()
+        self.setter_table = setter_table
+        self.next_setter_due = None
+        self.telemetry_rings = telemetry_rings
+        self.telemetry_identifiers = set()
+        self.sample_stream = sample_stream
+        self.recorders = recorders
+        self.event_bus = EventBus()
+        self.m_config = Config()
+        self.parser = StreamParser()
+        self.metrics = Metrics()
+        self.instrumented = self.metrics.enabled
+        # Every session records its own metrics, prefixed with the session name
+        prefix = f"{namespace}_" if namespace is not None else ""
+        self.read_latency = self.metrics.histogram(f"{prefix}serial_read_seconds", "Time spent reading a chunk from the serial port")
+        self.decode_latency = self.metrics.histogram(f"{prefix}decode_seconds", "Time spent decoding a chunk")
+        self.handoff_latency = self.metrics.histogram(f"{prefix}handoff_seconds", "Time from decoding until the samples are handed to rings and subscribers")
+        self.frames_counter = self.metrics.counter(f"{prefix}serial_frames", "Decoded frames")
+        self.bytes_counter = self.metrics.counter(f"{prefix}serial_bytes", "Received bytes")
+        self.bad_counter = self.metrics.counter(f"{prefix}serial_bad_frames", "Rejected runs of garbage bytes")
+        self.metrics.gauge(f"{prefix}serial_buffer_fill", "Bytes waiting in the parser buffer", source=lambda: self.parser.fill)
+
+        self.timeout_threshold = self.m_config.get("serial", "timeout_threshold")
+        self.packet_loss_threshold = self.m_config.get("serial", "packet_loss_threshold")
+        self.timeout_seconds = self.timeout_threshold / 1000
+        self.frame_period = self.get_frame_period(serial)
+
+    @staticmethod
+    def get_frame_period(serial):
+        """Get the time one frame takes on the wire (8N1 framing)."""
+        try:
+            return pkt.PACKET_SIZE * 10 / float(serial.baudrate)
+        except (AttributeError, TypeError, ValueError, ZeroDivisionError):
+            return 1e-6
+
+    def stop(self):
+        """Stop handling packets."""
+        self.setter_table.clear()
+
+        self.event_bus.publish(namespaced(self.namespace, Event.SERIAL_CLOSED.value))
+
+    def flush_setters(self):
+        """Send all pending parameter updates with a single write."""
+        if not self.setter_table.pending():
+            return
+
+        packet, self.next_setter_due = self.setter_table.collect()
+        if packet:
+            try:
+                self.serial.write(packet)
+            except Exception as e:
+                print(f"Error occurred while sending packet: {e}")
+
+    def process_received_packet(self, identifier, data):
+        """Process received packet."""
+        if identifier == PacketType.WRONG_DEVICE.value:
+            if time.monotonic() - self.last_received > self.timeout_seconds:
+                print("timeout")
+                self.stop()
+            return
+
+        if identifier is None:
+            self.packet_loss += 1
+            if self.packet_loss > self.packet_loss_threshold:
+                print("packet loss")
+                self.stop()
+            return
+        elif self.packet_loss > 0:
+            self.packet_loss = 0
+        
+        if identifier not in self.telemetry_identifiers:
+            self.event_bus.publish(namespaced(self.namespace, identifier), data)
+
+    def write_telemetry(self, timestamp, identifiers, values):
+        """Write telemetry samples to the registered rings in bulk."""
+        telemetry = np.zeros(len(identifiers), dtype=bool)
+        if not self.telemetry_rings:
+            return telemetry
+
+        # Frames of a chunk arrived back to back, spread their timestamps by the frame time
+        timestamps = timestamp - self.frame_period * np.arange(len(identifiers) - 1, -1, -1)
+        self.telemetry_identifiers = set()
+        for ring, ring_identifiers in self.telemetry_rings:
+            self.telemetry_identifiers.update(ring_identifiers.tolist())
+            mask = np.isin(identifiers, ring_identifiers)
+            if mask.any():
+                ring.write(timestamps[mask], identifiers[mask], values[mask])
+                telemetry |= mask
+        return telemetry
+
+    def process_frames(self, result):
+        """Process every frame decoded from a chunk."""
+        identifiers, values, offsets, rejects, _ = result
+        self.last_received = time.monotonic()
+        timestamp = time.time()
+        telemetry = self.write_telemetry(timestamp, identifiers, values)
+        for recorder in self.recorders:
+            recorder.append(self.last_received - self.frame_period * np.arange(len(identifiers) - 1, -1, -1), identifiers, values)
+
+        if len(rejects) == 0:
+            # Fast path, frames that are not telemetry are published in batches
+            if len(identifiers):
+                self.packet_loss = 0
+            events = ~telemetry
+            if events.any():
+                event_identifiers = identifiers[events]
+                event_values = values[events]
+                # One batch per run of equal identifiers, frames of different types stay in stream order
+                starts = [0] + (np.flatnonzero(np.diff(event_identifiers)) + 1).tolist()
+                ends = starts[1:] + [len(event_identifiers)]
+                for start, end in zip(starts, ends):
+                    self.event_bus.publish_many(namespaced(self.namespace, int(event_identifiers[start])), event_values[start:end])
+        else:
+            # Replay rejects in stream order so packet loss stays a count of consecutive bad frames
+            rejects_before = np.searchsorted(rejects, offsets).tolist()
+            processed_rejects = 0
+            for identifier, data, rejects_until in zip(identifiers.tolist(), values.tolist(), rejects_before):
+                for _ in range(rejects_until - processed_rejects):
+                    self.process_received_packet(None, None)
+                processed_rejects = rejects_until
+                self.process_received_packet(identifier, data)
+            for _ in range(len(rejects) - processed_rejects):
+                self.process_received_packet(None, None)
+
+        if self.sample_stream is not None and self.sample_stream.subscribers:
+            self.sample_stream.publish(timestamp, identifiers, values)
+
+    def handle_chunk(self):
+        """Read, decode and process all waiting bytes, returns False if nothing was read."""
+        if not self.instrumented:
+            if not self.parser.read_from(self.serial):
+                return False
+            self.process_frames(self.parser.parse())
+            return True
+
+        started = time.perf_counter()
+        received = self.parser.read_from(self.serial)
+        if not received:
+            return False
+        read = time.perf_counter()
+        result = self.parser.parse()
+        decoded = time.perf_counter()
+        self.process_frames(result)
+        handed_off = time.perf_counter()
+
+        self.read_latency.record(read - started)
+        self.decode_latency.record(decoded - read)
+        self.handoff_latency.record(handed_off - decoded)
+        self.bytes_counter.add(received)
+        self.frames_counter.add(len(result.identifiers))
+        self.bad_counter.add(len(result.rejects))
+        return True
+
+    def process_chunk(self):
+        """Read all waiting bytes at once and process every decoded frame."""
+        if not self.handle_chunk():
+            self.process_received_packet(PacketType.WRONG_DEVICE.value, None)
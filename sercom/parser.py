@@ -0,0 +1,58 @@
+import sercom.fastprotoc as pkt
+
+
+class StreamParser:
+    """Incremental parser for a stream of fixed-length frames."""
+    def __init__(self, buffer_size=4096):
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.fill = 0
+        self.good = 0
+        self.bad = 0
+        self.total_good = 0
+        self.total_bad = 0
+
+    def free(self):
+        """Get the number of bytes that can still be buffered."""
+        return len(self.buffer) - self.fill
+
+    def read_from(self, serial):
+        """Read all waiting bytes from the serial port straight into the buffer."""
+        size = min(serial.in_waiting, self.free())
+        if size <= 0:
+            return 0
+
+        received = serial.readinto(self.view[self.fill:self.fill + size]) or 0
+        self.fill += received
+        return received
+
+    def feed(self, data):
+        """Copy bytes into the buffer, returns the number of bytes accepted."""
+        size = min(len(data), self.free())
+        self.view[self.fill:self.fill + size] = data[:size]
+        self.fill += size
+        return size
+
+    def parse(self):
+        """Decode all complete frames in the buffer and keep the incomplete tail."""
+        result = pkt.decode_many(self.view[:self.fill])
+
+        # Move the unconsumed tail to the front, everything before it is either decoded or garbage
+        remaining = self.fill - result.consumed
+        if remaining:
+            self.buffer[:remaining] = self.view[result.consumed:self.fill]
+        self.fill = remaining
+
+        self.good = len(result.identifiers)
+        self.bad = len(result.rejects)
+        self.total_good += self.good
+        self.total_bad += self.bad
+        return result
+
+    def reset(self):
+        """Drop buffered bytes and counters."""
+        self.fill = 0
+        self.good = 0
+        self.bad = 0
+        self.total_good = 0
+        self.total_bad = 0
@@ -0,0 +1,129 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+from config import Config
+from event_bus import EventBus, Event
+from sercom.util import get_available_ports
+
+IN_ATTRIB = 0x004
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+WATCH_MASK = IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class Inotify:
+    """Minimal inotify binding, only tells that something changed in the watched directories."""
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path):
+        """Watch a directory, directories that do not exist (yet) are ignored."""
+        if os.path.isdir(path):
+            self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+
+    def drain(self):
+        """Discard the pending events."""
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_inotify():
+    """Get an inotify instance, or None where it is not available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return Inotify()
+    except (OSError, AttributeError) as e:
+        print(f"inotify is not available, polling serial ports: {e}")
+        return None
+
+
+class PortWatcher(threading.Thread):
+    """Watches the available serial ports off the UI thread.
+
+    The ports are listed again when inotify reports a change in /dev or in the
+    simulator and replay directories, or every `poll_interval` seconds where
+    inotify is not available. PORTS_CHANGED is published with the new port
+    list only when the list differs from the previous one.
+    """
+    def __init__(self, poll_interval=1.0, rescan_interval=10.0, settle_delay=0.2):
+        super().__init__(name="port-watcher", daemon=True)
+        self.event_bus = EventBus()
+        self.m_config = Config()
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.settle_delay = settle_delay
+        self.ports = None
+        self.stopped = threading.Event()
+        self.inotify = None
+        self.wakeup_r, self.wakeup_w = (None, None)
+
+    def watched_directories(self):
+        from simulator.virtual_device import get_registry_dir
+        # Created up front, a watch can only be added to an existing directory
+        os.makedirs(get_registry_dir(), exist_ok=True)
+        directories = ["/dev", get_registry_dir()]
+        if self.m_config.get("replay", "list_captures") is True:
+            directories.append(self.m_config.get("replay", "directory") or "recordings")
+        return directories
+
+    def run(self):
+        self.inotify = create_inotify()
+        if self.inotify is not None:
+            self.wakeup_r, self.wakeup_w = os.pipe()
+        try:
+            self.scan()
+            while not self.stopped.is_set():
+                self.wait()
+                if not self.stopped.is_set():
+                    self.scan()
+        finally:
+            if self.inotify is not None:
+                wakeup_w, self.wakeup_w = self.wakeup_w, None
+                self.inotify.close()
+                os.close(self.wakeup_r)
+                os.close(wakeup_w)
+
+    def wait(self):
+        """Wait for a change in the watched directories or the next poll."""
+        if self.inotify is None:
+            self.stopped.wait(self.poll_interval)
+            return
+
+        # Directories created later are picked up at the latest by the periodic rescan
+        for directory in self.watched_directories():
+            self.inotify.add_watch(directory)
+        readable, _, _ = select.select([self.inotify.fd, self.wakeup_r], [], [], self.rescan_interval)
+        if self.inotify.fd in readable:
+            # Device nodes appear in bursts, list the ports once they have settled
+            self.stopped.wait(self.settle_delay)
+            self.inotify.drain()
+
+    def scan(self):
+        """List the ports and publish them if they changed."""
+        ports = get_available_ports()
+        if ports != self.ports:
+            self.ports = ports
+            self.event_bus.publish(Event.PORTS_CHANGED.value, list(ports))
+
+    def stop(self):
+        self.stopped.set()
+        if self.wakeup_w is not None:
+            try:
+                os.write(self.wakeup_w, b"\0")
+            except OSError:
+                pass
@@ -0,0 +1,243 @@
+import multiprocessing
+import threading
+import time
+import numpy as np
+import serial
+from event_bus import EventBus, Event, namespaced
+from metrics import Metrics
+from sercom.fastprotoc import PacketType
+from sercom.shared_ring import SharedTelemetryRing
+
+DEFAULT_IDENTIFIERS = (PacketType.HALL_UPDATE.value, PacketType.PWM_UPDATE.value)
+PACKET_TYPES = frozenset(packet_type.value for packet_type in PacketType if packet_type.value >= 0)
+COUNTER_INTERVAL = 0.5
+
+
+class PipePublisher:
+    """Stands in for the event bus of the reader process, events are sent to the parent."""
+    def __init__(self, connection):
+        self.connection = connection
+        # The reader thread and the main thread of the process both send
+        self.lock = threading.Lock()
+
+    def publish(self, event_type, event_data=None):
+        self.send(("event", event_type, event_data))
+
+    def publish_many(self, event_type, events):
+        self.send(("events", event_type, np.asarray(events)))
+
+    def send(self, message):
+        try:
+            with self.lock:
+                self.connection.send(message)
+        except (BrokenPipeError, EOFError, OSError):
+            # The parent has stopped listening
+            pass
+
+
+def run_reader(connection, port, baud, ring_name, capacity, identifiers):
+    """Entry point of the reader process.
+
+    Opens the port, decodes into the shared ring and writes the bytes the
+    parent sends, until the parent asks to stop or the pipe is closed.
+    """
+    from sercom.sercom import open_serial
+    from sercom.serial_thread import SerialReaderThread
+    from sercom.setter_table import SetterTable
+
+    ring = SharedTelemetryRing.attach(ring_name, capacity)
+    try:
+        port_serial = open_serial(port, baud)
+    except Exception as e:
+        connection.send(("error", f"{type(e).__name__}: {e}"))
+        ring.close()
+        return
+
+    reader = SerialReaderThread(port_serial, SetterTable(()), [(ring, np.array(sorted(identifiers), dtype=np.uint8))])
+    publisher = reader.event_bus = PipePublisher(connection)
+    reader.start()
+    connection.send(("opened",))
+
+    def send_counters():
+        # The counters of this process are not exported, their totals are added in the parent
+        publisher.send(("counters", None, (reader.frames_counter.total, reader.bytes_counter.total, reader.bad_counter.total)))
+
+    last_counters = time.monotonic()
+    try:
+        while reader.is_alive():
+            if time.monotonic() - last_counters >= COUNTER_INTERVAL:
+                send_counters()
+                last_counters = time.monotonic()
+            if not connection.poll(0.1):
+                continue
+            message = connection.recv()
+            if message[0] == "write":
+                port_serial.write(message[1])
+            elif message[0] == "stop":
+                break
+    except (EOFError, OSError):
+        pass
+    finally:
+        if reader.is_alive():
+            reader.stop()
+            reader.join()
+        send_counters()
+        port_serial.close()
+        ring.close()
+
+
+class ReaderProcess:
+    """Reads and decodes a serial port in a separate process.
+
+    Telemetry samples arrive through a SharedTelemetryRing, other frames and
+    serial events through a pipe that also carries the parameter updates to
+    the device. A pump thread copies new samples into the registered rings,
+    recorders and sample stream and republishes the events, so a busy GUI can
+    delay the samples but never the reads from the serial port.
+
+    Used in place of the serial object of a session, it has the `is_open`,
+    `write` and `close` members the session needs.
+    """
+    def __init__(self, port, baud, setter_table, telemetry_rings, sample_stream=None, recorders=(), namespace=None, capacity=1 << 20):
+        self.port = port
+        self.baudrate = baud
+        self.setter_table = setter_table
+        self.telemetry_rings = telemetry_rings
+        self.sample_stream = sample_stream
+        self.recorders = recorders
+        self.namespace = namespace
+        self.capacity = capacity
+        self.event_bus = EventBus()
+        self.ring = None
+        self.cursor = 0
+        self.dropped = 0
+        self.process = None
+        self.connection = None
+        self.pump_thread = None
+        self.is_open = False
+        self.closed_forwarded = False
+        self._send_lock = threading.Lock()
+        prefix = f"{namespace}_" if namespace is not None else ""
+        self.metrics = Metrics()
+        self.counters = (
+            self.metrics.counter(f"{prefix}serial_frames", "Decoded frames"),
+            self.metrics.counter(f"{prefix}serial_bytes", "Received bytes"),
+            self.metrics.counter(f"{prefix}serial_bad_frames", "Rejected runs of garbage bytes"),
+        )
+        self.counter_totals = (0, 0, 0)
+        # Recorders take monotonic timestamps, the ring holds wall clock time
+        self.clock_offset = time.time() - time.monotonic()
+
+    def open(self, timeout=10.0):
+        """Start the reader process and wait until it has opened the port."""
+        identifiers = set()
+        for _, ring_identifiers in self.telemetry_rings:
+            identifiers.update(ring_identifiers.tolist())
+        self.ring = SharedTelemetryRing(self.capacity)
+
+        # Spawned, forking a process running Tk and several threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=run_reader,
+            args=(child_connection, self.port, self.baudrate, self.ring.name, self.capacity, tuple(identifiers or DEFAULT_IDENTIFIERS)),
+            name=f"serial-reader-{self.port}",
+            daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+
+        reply = self.connection.recv() if self.connection.poll(timeout) else ("error", "reader process did not start in time")
+        if reply[0] != "opened":
+            self.close()
+            raise serial.SerialException(reply[1])
+
+        self.is_open = True
+        self.pump_thread = threading.Thread(target=self.pump, name="serial-reader-pump", daemon=True)
+        self.pump_thread.start()
+
+    def write(self, data):
+        """Send bytes to the device through the reader process."""
+        with self._send_lock:
+            self.connection.send(("write", bytes(data)))
+
+    def pump(self):
+        """Forward events and samples from the reader process."""
+        try:
+            while self.is_open:
+                if self.connection.poll(0.01):
+                    while self.is_open and self.connection.poll():
+                        self.handle_message(self.connection.recv())
+                self.read_ring()
+                self.flush_setters()
+        except (EOFError, OSError):
+            if self.is_open:
+                self.is_open = False
+                # The reader forwards SERIAL_CLOSED when it stops on its own, only a crashed process needs it published here
+                if not self.closed_forwarded:
+                    self.event_bus.publish(namespaced(self.namespace, Event.SERIAL_CLOSED.value))
+
+    def handle_message(self, message):
+        kind, event_type, event_data = message
+        if kind == "event":
+            if event_type == Event.SERIAL_CLOSED.value:
+                self.closed_forwarded = True
+            self.event_bus.publish(namespaced(self.namespace, event_type), event_data)
+            if event_type in PACKET_TYPES:
+                self.record(np.array([event_type]), np.array([event_data], dtype=np.float32))
+        elif kind == "events":
+            self.event_bus.publish_many(namespaced(self.namespace, event_type), event_data)
+            self.record(np.full(len(event_data), event_type), event_data)
+        elif kind == "counters":
+            for counter, total, previous in zip(self.counters, event_data, self.counter_totals):
+                counter.add(total - previous)
+            self.counter_totals = event_data
+
+    def record(self, identifiers, values):
+        for recorder in self.recorders:
+            recorder.append(np.full(len(values), time.monotonic()), identifiers, values)
+
+    def read_ring(self):
+        """Copy the new samples into the rings of this process."""
+        self.cursor, timestamps, identifiers, values, dropped = self.ring.read_since(self.cursor)
+        self.dropped += dropped
+        if len(values) == 0:
+            return
+
+        for ring, ring_identifiers in self.telemetry_rings:
+            mask = np.isin(identifiers, ring_identifiers)
+            if mask.any():
+                ring.write(timestamps[mask], identifiers[mask], values[mask])
+        for recorder in self.recorders:
+            recorder.append(timestamps - self.clock_offset, identifiers, values)
+        if self.sample_stream is not None and self.sample_stream.subscribers:
+            self.sample_stream.publish(float(timestamps[-1]), identifiers.copy(), values.copy())
+
+    def flush_setters(self):
+        """Send the due parameter updates, rate limits are applied here."""
+        if self.setter_table.pending():
+            packet, _ = self.setter_table.collect()
+            if packet:
+                self.write(packet)
+
+    def close(self, timeout=2.0):
+        """Stop the reader process and release the shared ring."""
+        was_open, self.is_open = self.is_open, False
+        if self.pump_thread is not None and self.pump_thread is not threading.current_thread():
+            self.pump_thread.join(timeout)
+        if self.process is not None:
+            if was_open:
+                try:
+                    with self._send_lock:
+                        self.connection.send(("stop",))
+                except OSError:
+                    pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout)
+        if self.connection is not None:
+            self.connection.close()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
@@ -0,0 +1,216 @@
+import array
+import os
+import struct
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import sercom.fastprotoc as pkt
+from recorder import read_recording
+
+try:
+    import fcntl
+    import termios
+except ImportError:
+    fcntl = None
+
+REPLAY_SCHEME = "replay"
+RAW_MAGIC = b"PYLVRAW\0"
+RAW_VERSION = 1
+RAW_HEADER_FORMAT = "<8sI"
+RAW_CHUNK_FORMAT = "<dI"
+RAW_CHUNK_SIZE = struct.calcsize(RAW_CHUNK_FORMAT)
+
+
+class CaptureSerial:
+    """Serial port wrapper that dumps every received byte to a raw capture file."""
+    def __init__(self, serial, path):
+        self.serial = serial
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.capture = open(path, "wb")
+        self.capture.write(struct.pack(RAW_HEADER_FORMAT, RAW_MAGIC, RAW_VERSION))
+
+    def __getattr__(self, name):
+        return getattr(self.serial, name)
+
+    def read(self, size=1):
+        data = self.serial.read(size)
+        self.dump(data)
+        return data
+
+    def readinto(self, buffer):
+        received = self.serial.readinto(buffer) or 0
+        self.dump(buffer[:received])
+        return received
+
+    def dump(self, data):
+        """Append a timestamped chunk to the capture file."""
+        if len(data) and not self.capture.closed:
+            self.capture.write(struct.pack(RAW_CHUNK_FORMAT, time.monotonic(), len(data)))
+            self.capture.write(data)
+
+    def close(self):
+        self.capture.close()
+        self.serial.close()
+
+
+def load_raw_capture(path):
+    """Load a raw capture as a list of (monotonic time, bytes) chunks."""
+    chunks = []
+    with open(path, "rb") as f:
+        magic, version = struct.unpack(RAW_HEADER_FORMAT, f.read(struct.calcsize(RAW_HEADER_FORMAT)))
+        if magic != RAW_MAGIC:
+            raise ValueError("Not a PyLevit raw capture")
+        while True:
+            header = f.read(RAW_CHUNK_SIZE)
+            if len(header) < RAW_CHUNK_SIZE:
+                break
+            timestamp, size = struct.unpack(RAW_CHUNK_FORMAT, header)
+            chunks.append((timestamp, f.read(size)))
+    return chunks
+
+
+def write_raw_capture(path, chunks):
+    """Write (monotonic time, bytes) chunks as a raw capture."""
+    with open(path, "wb") as f:
+        f.write(struct.pack(RAW_HEADER_FORMAT, RAW_MAGIC, RAW_VERSION))
+        for timestamp, data in chunks:
+            f.write(struct.pack(RAW_CHUNK_FORMAT, timestamp, len(data)))
+            f.write(data)
+
+
+def load_sample_capture(path, resolution=0.001):
+    """Load a sample recording as (monotonic time, bytes) chunks of encoded frames."""
+    _, records = read_recording(path)
+    if len(records) == 0:
+        # Recordings of connects that timed out before the first frame are empty
+        return []
+    frames = pkt.encode_many(records["identifier"], records["value"])
+
+    # Group frames that arrived within the same time slot into one chunk
+    slots = np.floor(records["timestamp"] / resolution)
+    bounds = np.flatnonzero(np.diff(slots)) + 1
+    data = frames.tobytes()
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(records)]))
+    return [(float(records["timestamp"][start]), data[start * pkt.PACKET_SIZE:end * pkt.PACKET_SIZE]) for start, end in zip(starts.tolist(), ends.tolist())]
+
+
+def load_capture(path):
+    """Load a raw capture or a sample recording."""
+    with open(path, "rb") as f:
+        magic = f.read(len(RAW_MAGIC))
+    return load_raw_capture(path) if magic == RAW_MAGIC else load_sample_capture(path)
+
+
+class ReplaySerial:
+    """Serial-like object feeding a capture through a pipe at 1x, Nx or maximum speed.
+
+    The pipe gives the replay a real file descriptor, so every reader mode
+    works exactly as with a physical port. A speed of 0 replays as fast as
+    the reader consumes the data.
+    """
+    def __init__(self, path, speed=1.0, baudrate=115200, loop=False):
+        self.path = path
+        self.speed = speed
+        self.baudrate = baudrate
+        self.loop = loop
+        self.port = f"{REPLAY_SCHEME}://{path}"
+        self.chunks = load_capture(path)
+        self.is_open = True
+        self.bytes_written = 0
+        self.bytes_replayed = 0
+        self.started = None
+        self.finished = None
+        self._stop_event = threading.Event()
+
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        self._pump = threading.Thread(target=self.pump, name="replay-pump", daemon=True)
+        self._pump.start()
+
+    @classmethod
+    def from_url(cls, url, baudrate=115200):
+        """Create a replay from a replay://path?speed=N&loop=1 url, speed may be "max"."""
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        speed = query.get("speed", ["1"])[0]
+        speed = 0.0 if speed == "max" else float(speed)
+        loop = query.get("loop", ["0"])[0] in ("1", "true")
+        return cls(parsed.netloc + parsed.path, speed=speed, baudrate=baudrate, loop=loop)
+
+    def pump(self):
+        """Write the capture chunks into the pipe on schedule."""
+        self.started = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                origin = self.chunks[0][0] if self.chunks else 0.0
+                begin = time.monotonic()
+                for timestamp, data in self.chunks:
+                    if self._stop_event.is_set():
+                        break
+                    if self.speed > 0:
+                        delay = begin + (timestamp - origin) / self.speed - time.monotonic()
+                        if delay > 0 and self._stop_event.wait(delay):
+                            break
+                    os.write(self._write_fd, data)
+                    self.bytes_replayed += len(data)
+                if not self.loop or not self.chunks:
+                    break
+        except OSError:
+            pass
+        finally:
+            self.finished = time.monotonic()
+
+    @property
+    def in_waiting(self):
+        if fcntl is None:
+            # Without FIONREAD, offer a pipe buffer's worth, reads do not block
+            return 65536
+        buffer = array.array("i", [0])
+        fcntl.ioctl(self._read_fd, termios.FIONREAD, buffer)
+        return buffer[0]
+
+    def inWaiting(self):
+        return self.in_waiting
+
+    def fileno(self):
+        return self._read_fd
+
+    def read(self, size=1):
+        try:
+            return os.read(self._read_fd, size)
+        except BlockingIOError:
+            return b""
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def write(self, data):
+        """Accept setter writes, the replayed device does not answer them."""
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flushInput(self):
+        """Keep the replayed data, there is nothing stale to discard."""
+
+    def reset_input_buffer(self):
+        self.flushInput()
+
+    def throughput(self):
+        """Get the replayed bytes per second."""
+        end = self.finished or time.monotonic()
+        return self.bytes_replayed / max(end - (self.started or end), 1e-9)
+
+    def close(self):
+        if not self.is_open:
+            return
+        self.is_open = False
+        self._stop_event.set()
+        os.close(self._read_fd)
+        self._pump.join()
+        os.close(self._write_fd)
@@ -0,0 +1,56 @@
+import asyncio
+import numpy as np
+
+
+class SampleStream:
+    """Fan out decoded samples to asyncio consumers."""
+    def __init__(self, max_batches=1024):
+        self.max_batches = max_batches
+        self.subscribers = ()
+        self.dropped = 0
+
+    def subscribe(self, identifiers=None):
+        """Subscribe the running event loop, returns the queue receiving sample batches."""
+        loop = asyncio.get_running_loop()
+        sample_queue = asyncio.Queue(self.max_batches)
+        wanted = np.array(sorted(identifiers), dtype=np.uint8) if identifiers else None
+        self.subscribers = self.subscribers + ((loop, sample_queue, wanted),)
+        return sample_queue
+
+    def unsubscribe(self, sample_queue):
+        """Remove a subscriber queue."""
+        self.subscribers = tuple(s for s in self.subscribers if s[1] is not sample_queue)
+
+    def publish(self, timestamp, identifiers, values):
+        """Publish a batch of samples decoded at the same time."""
+        for loop, sample_queue, wanted in self.subscribers:
+            if wanted is None:
+                batch = (timestamp, identifiers, values)
+            else:
+                mask = np.isin(identifiers, wanted)
+                if not mask.any():
+                    continue
+                batch = (timestamp, identifiers[mask], values[mask])
+            try:
+                loop.call_soon_threadsafe(self._offer, sample_queue, batch)
+            except RuntimeError:
+                # Subscriber loop has been closed
+                self.unsubscribe(sample_queue)
+
+    def _offer(self, sample_queue, batch):
+        """Put a batch into a subscriber queue, dropping it if the consumer is too slow."""
+        try:
+            sample_queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            self.dropped += len(batch[1])
+
+    async def iterate(self, identifiers=None):
+        """Iterate over (timestamp, identifier, value) samples."""
+        sample_queue = self.subscribe(identifiers)
+        try:
+            while True:
+                timestamp, identifiers, values = await sample_queue.get()
+                for identifier, value in zip(identifiers.tolist(), values.tolist()):
+                    yield timestamp, identifier, value
+        finally:
+            self.unsubscribe(sample_queue)
@@ -1,95 +1,297 @@
+import asyncio
+import os
+from datetime import datetime
+import numpy as np
 import serial
-from event_bus import EventBus, Event
+from config import Config
+from event_bus import EventBus, Event, namespaced
+from metrics import Metrics
+from recorder import TelemetryRecorder
 import sercom.fastprotoc as pkt
+from sercom.fastprotoc import PacketType
+from sercom.replay import REPLAY_SCHEME, CaptureSerial, ReplaySerial
+from sercom.event_loop import EventLoopThread
+from sercom.multiplexer import MultiplexedHandler
+from sercom.reader_process import ReaderProcess
+from sercom.port_watcher import PortWatcher
+from sercom.sample_stream import SampleStream
 from sercom.serial_thread import SerialReaderThread
+from sercom.setter_table import SetterTable
+from sercom.transport import SerialProtocol, SerialTransport
+from sercom.util import has_file_descriptor
 
+SETTER_TYPES = {packet_type.name: packet_type.value for packet_type in (
+    PacketType.SETPOINT_UPDATE,
+    PacketType.KP_UPDATE,
+    PacketType.KI_UPDATE,
+    PacketType.KD_UPDATE,
+)}
 
-class Sercom:
-    _instance = None
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.event_bus = EventBus()
-            cls._instance.port = None
-            cls._instance.baud = None
-            cls._instance.serial = None
-            cls._instance.serial_thread = None
-            cls._instance.setter_queues = {}
-            cls._instance.getter_queues = {}
-        return cls._instance
+def open_serial(port, baud, name=None):
+    """Open a serial port, a replay://path?speed=N url or a raw capture of either."""
+    if port.startswith(f"{REPLAY_SCHEME}://"):
+        port_serial = ReplaySerial.from_url(port, int(baud))
+    else:
+        port_serial = serial.Serial(port=port, baudrate=baud, timeout=0.1)
+
+    m_config = Config()
+    if m_config.get("recorder", "capture_raw") is True:
+        directory = m_config.get("recorder", "directory") or "recordings"
+        suffix = f"_{name}" if name is not None else ""
+        port_serial = CaptureSerial(port_serial, os.path.join(directory, f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{suffix}.raw"))
+    return port_serial
+
+
+class SerialSession:
+    """Connection to one device with its own reader, setter table, rings and recorders.
+
+    A named session publishes its events on topics namespaced with its name
+    (see `topic`), so several sessions can share the event bus. Sessions can
+    share an event loop thread and a SerialMultiplexer that services all their
+    ports from one thread.
+    """
+    def __init__(self, name=None, loop_thread=None, multiplexer=None):
+        self.name = name
+        self.event_bus = EventBus()
+        self.m_config = Config()
+        self.port = None
+        self.baud = None
+        self.serial = None
+        self.serial_thread = None
+        self.transport = None
+        self.handler = None
+        self.multiplexer = multiplexer
+        self.setter_table = self.create_setter_table()
+        self.telemetry_rings = []
+        self.sample_stream = SampleStream()
+        prefix = f"{name}_" if name is not None else ""
+        Metrics().gauge(f"{prefix}sample_stream_dropped", "Sample batches dropped because a subscriber queue was full", source=lambda: self.sample_stream.dropped)
+        self.recorders = []
+        self.owns_loop = loop_thread is None
+        self.loop_thread = EventLoopThread() if loop_thread is None else loop_thread
+        if self.owns_loop:
+            self.loop_thread.start()
+
+    def topic(self, topic):
+        """Get the event bus topic of an event or packet type for this session."""
+        return namespaced(self.name, topic)
+
+    def submit(self, coro):
+        """Run a coroutine on the serial event loop, returns a future the UI can poll."""
+        return self.loop_thread.submit(coro)
 
-    async def connect(self, port: str, baud: int):
-        """Connects to the specified serial port at the given baud rate."""
+    async def _run_in_loop(self, coro):
+        """Await a coroutine on the serial event loop from any other loop."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+    async def connect(self, port: str, baud: int, record=None, record_path=None):
+        """Connects to the specified serial port at the given baud rate.
+
+        A recording to `record_path` is started when `record` is true, by
+        default when recorder.enabled is set.
+        """
+        if not self.loop_thread.in_loop():
+            return await self._run_in_loop(self.connect(port, baud, record, record_path))
+
+        if record is None:
+            record = self.m_config.get("recorder", "enabled") is True
+        loop = asyncio.get_running_loop()
         try:
             await self.disconnect()
             self.port = port
             self.baud = baud
-            self.serial = serial.Serial(port=port, baudrate=baud, timeout=0.1)
-            await self.start(self.serial)
-            self.event_bus.publish(Event.SERIAL_OPENED.value)
+            if self.m_config.get("serial", "reader_mode") == "process":
+                self.serial = await loop.run_in_executor(None, self.open_process, port, baud)
+            else:
+                self.serial = await loop.run_in_executor(None, self.open_port, port, baud)
+                await self.start(self.serial)
+            if record:
+                self.start_recording(record_path)
+            self.event_bus.publish(self.topic(Event.SERIAL_OPENED.value))
         except serial.SerialException as e:
             print(f"Error opening port {port}. Is it in use?")
             raise e
         except Exception as e:
             print("An error occurred while connecting to the serial port.")
             raise e
-    
+
+    def open_port(self, port, baud):
+        """Open a serial port, a replay://path?speed=N url or a raw capture of either."""
+        return open_serial(port, baud, self.name)
+
+    def open_process(self, port, baud):
+        """Open a port in a reader process, the samples are shared through shared memory."""
+        reader = ReaderProcess(port, baud, self.setter_table, self.telemetry_rings, self.sample_stream, self.recorders, self.name,
+                               self.m_config.get("serial", "process_ring_size") or 1 << 20)
+        reader.open()
+        return reader
+
     async def disconnect(self):
         """Disconnects from the serial port."""
+        if not self.loop_thread.in_loop():
+            return await self._run_in_loop(self.disconnect())
+
         if self.serial is None:
             return
-        
+
+        if isinstance(self.serial, ReaderProcess) and not self.serial.is_open:
+            # The reader process has exited on its own, its ring is still to be released
+            await self.stop()
+            self.serial = None
+            return
+
         if self.serial.is_open:
             try:
                 await self.stop()
+                self.stop_recording()
                 self.serial.close()
+                if isinstance(self.serial, ReplaySerial):
+                    print(f"Replayed {self.serial.bytes_replayed} bytes at {self.serial.throughput():.0f} B/s")
                 self.port = None
                 self.baud = None
                 self.serial = None
-                self.event_bus.publish(Event.SERIAL_CLOSED.value)
+                self.event_bus.publish(self.topic(Event.SERIAL_CLOSED.value))
             except Exception as e:
                 print("An error occurred while disconnecting from the serial port.")
                 raise e
 
     async def start(self, serial: serial.Serial):
-        """Start the serial thread."""
+        """Start the serial reader."""
         await self.stop()
         serial.flushInput()
 
         try:
-            self.serial_thread = SerialReaderThread(serial, self.setter_queues, self.getter_queues)
-            self.serial_thread.start()
+            if self.multiplexer is not None and has_file_descriptor(serial):
+                self.handler = MultiplexedHandler(serial, self.setter_table, self.telemetry_rings, self.sample_stream, self.recorders, self.name)
+                self.multiplexer.add(self.handler)
+            elif self.m_config.get("serial", "reader_mode") == "asyncio" and has_file_descriptor(serial):
+                protocol = SerialProtocol(serial, self.setter_table, self.telemetry_rings, self.sample_stream, self.recorders, self.name)
+                self.transport = SerialTransport(asyncio.get_running_loop(), serial, protocol)
+                self.transport.start()
+            else:
+                self.serial_thread = SerialReaderThread(serial, self.setter_table, self.telemetry_rings, self.sample_stream, self.recorders, self.name)
+                self.serial_thread.start()
         except Exception as e:
-            print("Failed to start reader thread")
+            print("Failed to start reader")
             raise e
 
     async def stop(self):
-        """Stop the serial thread."""
+        """Stop the serial reader."""
         try:
+            if self.transport is not None:
+                self.transport.close()
+                self.transport = None
+            if self.handler is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self.multiplexer.remove, self.handler)
+                self.handler = None
             if self.serial_thread and self.serial_thread.is_alive():
                 self.serial_thread.stop()
-                self.serial_thread.join()
+                await asyncio.get_running_loop().run_in_executor(None, self.serial_thread.join)
+            if isinstance(self.serial, ReaderProcess):
+                await asyncio.get_running_loop().run_in_executor(None, self.serial.close)
         except Exception as e:
-            print("Failed to stop previous reader thread")
+            print("Failed to stop previous reader")
             raise e
-        
-    def add_setter_queue(self, identifier, setter_queue):
-        """Add setter queue"""
-        self.setter_queues[identifier] = setter_queue
 
-    def add_getter_queue(self, identifier, getter_queue):
-        """Add getter queue with format (time, data)"""
-        self.getter_queues[identifier] = getter_queue
+    async def send(self, identifier, data):
+        """Send a packet to the connected device."""
+        if not self.loop_thread.in_loop():
+            return await self._run_in_loop(self.send(identifier, data))
+
+        if not self.is_connected():
+            raise ConnectionError("Serial port is not connected")
+        pkt.send(self.serial, identifier, data)
+
+    async def samples(self, *identifiers):
+        """Iterate over received (timestamp, identifier, value) samples."""
+        async for sample in self.sample_stream.iterate(identifiers):
+            yield sample
+
+    def shutdown(self):
+        """Stop the serial event loop if the session owns it."""
+        if self.owns_loop:
+            self.loop_thread.shutdown()
+
+    def create_setter_table(self):
+        """Create the parameter slot table with the configured rate limits."""
+        max_rates = self.m_config.get("serial", "max_update_rate") or {}
+        setter_table = SetterTable(SETTER_TYPES.values(), {SETTER_TYPES[name]: rate for name, rate in max_rates.items() if name in SETTER_TYPES})
+        setter_table.on_update = self.wakeup
+        return setter_table
+
+    def set_parameter(self, identifier, value):
+        """Queue a parameter update, only the latest value per identifier is sent."""
+        self.setter_table.set(identifier, value)
+
+    def start_recording(self, path=None):
+        """Record every received frame to a memory-mapped file."""
+        if path is None:
+            directory = self.m_config.get("recorder", "directory") or "recordings"
+            suffix = f"_{self.name}" if self.name is not None else ""
+            path = os.path.join(directory, f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{suffix}.rec")
+
+        metadata = {"session": self.name, "port": self.port, "baud": self.baud, "config": self.m_config.get()}
+        recorder = TelemetryRecorder(path, metadata, self.m_config.get("recorder", "chunk_records") or 65536)
+        self.recorders.append(recorder)
+        return recorder
+
+    def stop_recording(self):
+        """Stop all running recordings."""
+        for recorder in list(self.recorders):
+            recorder.close()
+            self.recorders.remove(recorder)
+
+    def add_telemetry_ring(self, ring, identifiers):
+        """Route samples with the given identifiers into a TelemetryRing instead of the event bus."""
+        self.telemetry_rings.append((ring, np.array(sorted(identifiers), dtype=np.uint8)))
+
+    def wakeup(self):
+        """Wake the reader so pending parameter updates are sent immediately."""
+        if self.transport is not None:
+            self.loop_thread.call_soon(self.transport.flush_setters)
+        elif self.handler is not None:
+            self.multiplexer.wakeup()
+        elif self.serial_thread and self.serial_thread.is_alive():
+            self.serial_thread.wakeup()
 
     def is_connected(self):
         """Check if the serial connection is open."""
         return self.serial is not None and self.serial.is_open
-    
+
     def get_serial(self):
         """Get the serial object."""
         return self.serial
-    
+
     def get_port(self):
         """Get the name of the serial port."""
         return self.port
+
+
+class Sercom(SerialSession):
+    """The default session, used by the GUI and published on the plain topics."""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            SerialSession.__init__(cls._instance)
+            cls._instance.port_watcher = None
+        return cls._instance
+
+    def __init__(self):
+        # Initialized once in __new__, SerialSession.__init__ must not run again
+        pass
+
+    def watch_ports(self):
+        """Start watching the available ports, PORTS_CHANGED is published when they change."""
+        if self.port_watcher is None:
+            self.port_watcher = PortWatcher(self.m_config.get("serial", "port_poll_interval") or 1.0)
+            self.port_watcher.start()
+        return self.port_watcher
+
+    def shutdown(self):
+        """Stop the serial event loop and the port watcher."""
+        if self.port_watcher is not None:
+            self.port_watcher.stop()
+        super().shutdown()
@@ -1,74 +1,66 @@
+import os
+import select
 import threading
 import time
-from sercom.fastprotoc import PacketType
-from config import Config
-from event_bus import EventBus, Event
-import sercom.fastprotoc as pkt
+from sercom.packet_handler import PacketHandler
+from sercom.util import has_file_descriptor
 
 
-class SerialReaderThread(threading.Thread):
+class SerialReaderThread(PacketHandler, threading.Thread):
     """Thread class to read data from serial port."""
-    def __init__(self, serial, setter_queues, getter_queues):
-        super().__init__()
-        self.serial = serial
-        self.packet_loss = 0
-        self.timeout = 0
-        self.setter_queues = setter_queues
-        self.getter_queues = getter_queues
-        self.event_bus = EventBus()
-        self.m_config = Config()
+    def __init__(self, serial, setter_table, telemetry_rings, sample_stream=None, recorders=(), namespace=None):
+        threading.Thread.__init__(self)
+        PacketHandler.__init__(self, serial, setter_table, telemetry_rings, sample_stream, recorders, namespace)
         self._stop_event = threading.Event()
 
-        self.timeout_threshold = self.m_config.get("serial", "timeout_threshold")
-        self.packet_loss_threshold = self.m_config.get("serial", "packet_loss_threshold")
+        self.event_driven = self.m_config.get("serial", "reader_mode") == "select" and has_file_descriptor(serial)
+        self._wakeup_lock = threading.Lock()
+        self._wakeup_read, self._wakeup_write = os.pipe() if self.event_driven else (None, None)
+        if self.event_driven:
+            os.set_blocking(self._wakeup_read, False)
+            os.set_blocking(self._wakeup_write, False)
 
     def stop(self):
         """Stop the thread."""
         self._stop_event.set()
-        for q in self.setter_queues.values():
-            q.queue.clear()
-        for q in self.getter_queues.values():
-            q.queue.clear()
-
-        self.event_bus.publish(Event.SERIAL_CLOSED.value)
+        self.wakeup()
+        super().stop()
 
     def stopped(self):
         """Check if thread is stopped."""
         return self._stop_event.is_set()
     
-    def process_setter_queues(self):
-        """Process data in the setter queues."""
-        for identifier, queue in self.setter_queues.items():
-            if queue.empty():
-                continue
-            pkt.send(self.serial, identifier, queue.get())
-            while not queue.empty():
-                queue.get()
+    def wakeup(self):
+        """Wake the reader if it is waiting for serial data."""
+        with self._wakeup_lock:
+            if self._wakeup_write is None:
+                return
+            try:
+                os.write(self._wakeup_write, b"\0")
+            except OSError:
+                pass
+
+    def wait_for_data(self):
+        """Block until serial data arrives, the reader is woken up or a deadline expires."""
+        deadline = self.last_received + self.timeout_seconds
+        if self.setter_table.pending() and self.next_setter_due is not None:
+            deadline = min(deadline, self.next_setter_due)
+        remaining = deadline - time.monotonic()
+        readable, _, _ = select.select([self.serial.fileno(), self._wakeup_read], [], [], max(remaining, 0))
+        if self._wakeup_read in readable:
+            try:
+                while os.read(self._wakeup_read, 512):
+                    pass
+            except BlockingIOError:
+                pass
 
-    def process_received_packet(self, identifier, data):
-        """Process received packet."""
-        if identifier == PacketType.WRONG_DEVICE.value:
-            self.timeout += 1
-            if self.timeout > self.timeout_threshold:
-                print("timeout")
-                self.stop()
-            return
-        elif self.timeout > 0:
-            self.timeout = 0
-        
-        if identifier is None:
-            self.packet_loss += 1
-            if self.packet_loss > self.packet_loss_threshold:
-                print("packet loss")
-                self.stop()
-            return
-        elif self.packet_loss > 0:
-            self.packet_loss = 0
-        
-        if identifier in self.getter_queues:
-            self.getter_queues[identifier].put((time.time(), data))
-        else:
-            self.event_bus.publish(identifier, data)
+    def close_wakeup_pipe(self):
+        """Close the wake-up pipe."""
+        with self._wakeup_lock:
+            for fd in (self._wakeup_read, self._wakeup_write):
+                if fd is not None:
+                    os.close(fd)
+            self._wakeup_read, self._wakeup_write = None, None
 
     def run(self):
         """Run the thread."""
@@ -77,12 +69,19 @@ class SerialReaderThread(threading.Thread):
                 if self.serial is None or not self.serial.is_open:
                     raise Exception("Serial closed before reader has been properly closed.")
 
-                self.process_setter_queues()
+                if self.event_driven:
+                    self.wait_for_data()
+                    if self.stopped():
+                        break
+
+                self.flush_setters()
 
-                identifier, data = pkt.receive(self.serial)
-                self.process_received_packet(identifier, data)
+                self.process_chunk()
 
-                time.sleep(0.001)
+                if not self.event_driven:
+                    time.sleep(0.001)
         except Exception as e:
             print("An error occurred while running the serial reader thread")
             raise e
+        finally:
+            self.close_wakeup_pipe()
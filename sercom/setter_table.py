@@ -0,0 +1,73 @@
+import math
+import struct
+import threading
+import time
+import sercom.fastprotoc as pkt
+
+
+class SetterTable:
+    """Latest-value slots for parameter updates, flushed as a single write."""
+    def __init__(self, identifiers, max_rates=None):
+        self.identifiers = tuple(identifiers)
+        self.slots = {identifier: index for index, identifier in enumerate(self.identifiers)}
+        self.values = [0.0] * len(self.identifiers)
+        self.last_sent = [-math.inf] * len(self.identifiers)
+        self.min_intervals = [0.0] * len(self.identifiers)
+        self.dirty = 0
+        self.buffer = bytearray(len(self.identifiers) * pkt.PACKET_SIZE)
+        self.view = memoryview(self.buffer)
+        self.on_update = None
+        self._lock = threading.Lock()
+
+        for identifier, rate in (max_rates or {}).items():
+            self.set_max_rate(identifier, rate)
+
+    def set_max_rate(self, identifier, rate):
+        """Limit how many updates per second are sent for an identifier."""
+        self.min_intervals[self.slots[identifier]] = 1 / rate if rate else 0.0
+
+    def set(self, identifier, value):
+        """Store the latest value of a parameter and mark it for sending."""
+        index = self.slots[identifier]
+        with self._lock:
+            self.values[index] = value
+            self.dirty |= 1 << index
+        if self.on_update is not None:
+            self.on_update()
+
+    def pending(self):
+        """Check if any value is waiting to be sent."""
+        return self.dirty != 0
+
+    def collect(self, now=None):
+        """Pack all due values into one buffer.
+
+        Returns the packed frames and the monotonic time at which the next
+        rate-limited value becomes due, or None if nothing is held back.
+        """
+        now = time.monotonic() if now is None else now
+        size = 0
+        next_due = None
+
+        with self._lock:
+            dirty = self.dirty
+            while dirty:
+                index = (dirty & -dirty).bit_length() - 1
+                dirty &= dirty - 1
+
+                due = self.last_sent[index] + self.min_intervals[index]
+                if due > now:
+                    next_due = due if next_due is None else min(next_due, due)
+                    continue
+
+                struct.pack_into(pkt.PACKET_FORMAT, self.buffer, size, ord(pkt.START_DELIMITER), self.identifiers[index], ord(pkt.SEPARATOR), self.values[index], ord(pkt.END_DELIMITER))
+                size += pkt.PACKET_SIZE
+                self.last_sent[index] = now
+                self.dirty &= ~(1 << index)
+
+        return self.view[:size], next_due
+
+    def clear(self):
+        """Drop all pending values."""
+        with self._lock:
+            self.dirty = 0
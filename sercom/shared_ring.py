@@ -0,0 +1,50 @@
+import numpy as np
+from multiprocessing import shared_memory
+from sercom.telemetry_ring import TelemetryRing
+
+HEADER_SIZE = 64
+
+
+class SharedTelemetryRing(TelemetryRing):
+    """TelemetryRing stored in shared memory, written by one process and read by another.
+
+    The head is kept in the shared header and only advanced after the
+    samples have been written, like in the in-process ring.
+    """
+    def __init__(self, capacity, name=None):
+        self.capacity = capacity
+        size = HEADER_SIZE + 2 * capacity * (8 + 4 + 1)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.owner = name is None
+        buffer = self.shm.buf
+        self._head = np.ndarray(1, dtype=np.int64, buffer=buffer)
+        self.timestamps = np.ndarray(2 * capacity, dtype=np.float64, buffer=buffer, offset=HEADER_SIZE)
+        self.values = np.ndarray(2 * capacity, dtype=np.float32, buffer=buffer, offset=HEADER_SIZE + 16 * capacity)
+        self.identifiers = np.ndarray(2 * capacity, dtype=np.uint8, buffer=buffer, offset=HEADER_SIZE + 24 * capacity)
+        if self.owner:
+            self._head[0] = 0
+
+    @classmethod
+    def attach(cls, name, capacity):
+        """Open a ring created by another process."""
+        return cls(capacity, name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        return int(self._head[0])
+
+    @head.setter
+    def head(self, value):
+        self._head[0] = value
+
+    def close(self):
+        """Unmap the ring, the creator also removes it."""
+        # The views must be released before the mapping can be closed
+        self._head = self.timestamps = self.values = self.identifiers = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class TelemetryRing:
+    """Single-producer/single-consumer ring of (timestamp, identifier, value) samples.
+
+    The arrays are mirrored (every sample is stored at `i` and `i + capacity`)
+    so any window of up to `capacity` samples can be returned as a contiguous
+    view without copying. Views stay valid until the producer has written
+    another `capacity - len(view)` samples.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self.identifiers = np.zeros(2 * capacity, dtype=np.uint8)
+        self.values = np.zeros(2 * capacity, dtype=np.float32)
+        self.head = 0
+
+    def __len__(self):
+        return min(self.head, self.capacity)
+
+    def write(self, timestamps, identifiers, values):
+        """Append a batch of samples, timestamps may be a scalar for the whole batch."""
+        count = len(values)
+        if count == 0:
+            return
+        if count > self.capacity:
+            timestamps = timestamps if np.isscalar(timestamps) else timestamps[-self.capacity:]
+            identifiers = identifiers[-self.capacity:]
+            values = values[-self.capacity:]
+            skipped = count - self.capacity
+            count = self.capacity
+        else:
+            skipped = 0
+
+        start = (self.head + skipped) % self.capacity
+        split = min(count, self.capacity - start)
+        for column, data in ((self.timestamps, timestamps), (self.identifiers, identifiers), (self.values, values)):
+            column[start:start + count] = data
+            # Mirror the part below capacity above it and the wrapped part below it
+            column[start + self.capacity:start + self.capacity + split] = column[start:start + split]
+            if split < count:
+                column[:count - split] = column[self.capacity:self.capacity + count - split]
+
+        # Publish the samples only after they have been written
+        self.head += skipped + count
+
+    def read_since(self, cursor):
+        """Get all samples written after a cursor.
+
+        Returns the new cursor, views of timestamps, identifiers and values,
+        and the number of samples that were overwritten before being read.
+        """
+        head = self.head
+        dropped = max(0, head - self.capacity - cursor)
+        cursor += dropped
+        start = cursor % self.capacity
+        end = start + head - cursor
+        return head, self.timestamps[start:end], self.identifiers[start:end], self.values[start:end], dropped
+
+    def latest(self, count=None):
+        """Get views of the most recent samples."""
+        count = len(self) if count is None else min(count, len(self))
+        _, timestamps, identifiers, values, _ = self.read_since(self.head - count)
+        return timestamps, identifiers, values
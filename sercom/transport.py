@@ -0,0 +1,99 @@
+import time
+from sercom.fastprotoc import PacketType
+from sercom.packet_handler import PacketHandler
+
+
+class SerialProtocol(PacketHandler):
+    """Asyncio protocol handling the frames read by a SerialTransport."""
+    def __init__(self, serial, setter_table, telemetry_rings, sample_stream=None, recorders=(), namespace=None):
+        super().__init__(serial, setter_table, telemetry_rings, sample_stream, recorders, namespace)
+        self.transport = None
+        self.watchdog = None
+        self.setter_timer = None
+
+    def connection_made(self, transport):
+        """Called when the transport starts reading."""
+        self.transport = transport
+        self.last_received = time.monotonic()
+        self.schedule_watchdog()
+
+    def connection_lost(self, exc):
+        """Called when the transport is closed."""
+        for timer in (self.watchdog, self.setter_timer):
+            if timer is not None:
+                timer.cancel()
+        self.watchdog = None
+        self.setter_timer = None
+        self.transport = None
+
+    def data_received(self):
+        """Called when the serial port is readable."""
+        self.handle_chunk()
+
+    def flush_setters(self):
+        """Send pending parameter updates and retry rate-limited ones when due."""
+        super().flush_setters()
+        if self.setter_timer is not None:
+            self.setter_timer.cancel()
+            self.setter_timer = None
+        if self.transport is not None and self.setter_table.pending() and self.next_setter_due is not None:
+            self.setter_timer = self.transport.loop.call_at(self.next_setter_due, self.flush_setters)
+
+    def schedule_watchdog(self):
+        """Periodically check the receive timeout."""
+        self.watchdog = self.transport.loop.call_later(min(self.timeout_seconds, 0.5), self.check_timeout)
+
+    def check_timeout(self):
+        """Check if nothing has been received for too long."""
+        self.process_received_packet(PacketType.WRONG_DEVICE.value, None)
+        if self.transport is not None:
+            self.schedule_watchdog()
+
+    def stop(self):
+        """Stop reading and close the transport."""
+        if self.transport is not None:
+            self.transport.close()
+        super().stop()
+
+
+class SerialTransport:
+    """Asyncio transport reading a serial port through its file descriptor."""
+    def __init__(self, loop, serial, protocol):
+        self.loop = loop
+        self.serial = serial
+        self.protocol = protocol
+        self.fd = serial.fileno()
+        self.closing = False
+
+    def start(self):
+        """Start watching the serial file descriptor."""
+        self.loop.add_reader(self.fd, self._read_ready)
+        self.protocol.connection_made(self)
+
+    def _read_ready(self):
+        try:
+            self.protocol.data_received()
+        except Exception as e:
+            print(f"Error occurred while reading from serial port: {e}")
+            self.close()
+
+    def write(self, data):
+        """Write bytes to the serial port."""
+        self.serial.write(data)
+
+    def flush_setters(self):
+        """Send the pending parameter updates."""
+        if not self.closing:
+            self.protocol.flush_setters()
+
+    def close(self):
+        """Stop watching the serial port."""
+        if self.closing:
+            return
+        self.closing = True
+        self.loop.remove_reader(self.fd)
+        self.protocol.connection_lost(None)
+
+    def is_closing(self):
+        """Check if the transport has been closed."""
+        return self.closing
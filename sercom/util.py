@@ -1,13 +1,48 @@
+import os
 import serial
 import serial.tools.list_ports
+from config import Config
+
+
+def get_replay_ports():
+    """Get replay urls for the captures in the replay directory."""
+    m_config = Config()
+    if m_config.get("replay", "list_captures") is not True:
+        return []
+
+    directory = m_config.get("replay", "directory") or "recordings"
+    speed = m_config.get("replay", "speed") or 1
+    if not os.path.isdir(directory):
+        return []
+    return [f"replay://{os.path.join(directory, name)}?speed={speed}" for name in sorted(os.listdir(directory)) if name.endswith((".rec", ".raw"))]
+
+
+def get_simulator_ports():
+    """Get the ports of running virtual levitators."""
+    m_config = Config()
+    if m_config.get("simulator", "list_ports") is not True or os.name == "nt":
+        return []
+
+    from simulator.virtual_device import get_virtual_ports
+    return get_virtual_ports()
 
 
 def get_available_ports():
     """Get available serial ports."""
     try:
         ports = serial.tools.list_ports.comports()
-        port_names = [port.device for port in ports]
-        return port_names
+        port_names = [port.device for port in ports] + get_simulator_ports() + get_replay_ports()
+        return port_names or ["None"]
     except Exception as e:
         print(f"Error occurred while fetching available ports: {e}")
         return ["None"]
+
+
+def has_file_descriptor(serial):
+    """Check if the serial port exposes a file descriptor that can be waited on."""
+    if os.name == "nt":
+        return False
+    try:
+        return serial.fileno() >= 0
+    except Exception:
+        return False
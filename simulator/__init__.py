@@ -0,0 +1,2 @@
+from .plant import MaglevPlant, PIDController
+from .virtual_device import VirtualLevitator, get_virtual_ports
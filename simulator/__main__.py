@@ -0,0 +1,33 @@
+import argparse
+import time
+from simulator.virtual_device import VirtualLevitator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a virtual levitator on a pseudo-terminal.")
+    parser.add_argument("--rate", type=float, default=1000, help="telemetry frames per second")
+    parser.add_argument("--noise", type=float, default=0.0, help="standard deviation of the hall sensor noise")
+    parser.add_argument("--corruption", type=float, default=0.0, help="fraction of frames with a corrupted byte")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for noise and corruption")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    args = parser.parse_args()
+
+    device = VirtualLevitator(args.rate, args.noise, args.corruption, seed=args.seed)
+    device.register()
+    device.start()
+    print(f"Virtual levitator listening on {device.port}")
+
+    started = time.monotonic()
+    try:
+        while device.is_alive() and (args.duration is None or time.monotonic() - started < args.duration):
+            time.sleep(1)
+            print(f"sent {device.frames_sent()} dropped {device.frames_dropped()} corrupted {device.frames_corrupted} setters {device.setters_received}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
+        device.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import math
+
+
+class MaglevPlant:
+    """Ball levitating below an electromagnet, position measured by a hall sensor."""
+    def __init__(self, mass=0.02, gap_min=0.002, gap_max=0.03, gap_eq=0.01, duty_eq=128):
+        self.mass = mass
+        self.gravity = 9.81
+        self.gap_min = gap_min
+        self.gap_max = gap_max
+        # Magnet constant chosen so the ball is in equilibrium at gap_eq with duty_eq
+        self.magnet = mass * self.gravity * gap_eq ** 2 / (duty_eq / 255) ** 2
+        self.gap = gap_eq
+        self.velocity = 0.0
+
+    def step(self, duty, dt):
+        """Advance the simulation by dt seconds with the given PWM duty (0-255)."""
+        current = min(max(duty, 0), 255) / 255
+        acceleration = self.gravity - self.magnet * current ** 2 / (self.mass * self.gap ** 2)
+        self.velocity += acceleration * dt
+        self.gap += self.velocity * dt
+
+        # The ball sticks to the magnet or rests on the floor
+        if self.gap < self.gap_min or self.gap > self.gap_max:
+            self.gap = min(max(self.gap, self.gap_min), self.gap_max)
+            self.velocity = 0.0
+
+    def sensor(self):
+        """Get the hall sensor reading, 0 with the ball on the floor and 500 at the magnet."""
+        return 500 * (self.gap_max - self.gap) / (self.gap_max - self.gap_min)
+
+
+class PIDController:
+    """PID controller in the firmware's sensor units, output is a PWM duty."""
+    def __init__(self, kp=0.0, ki=0.0, kd=0.0, bias=128, integral_limit=1000.0, derivative_filter=0.005):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.bias = bias
+        self.integral_limit = integral_limit
+        self.derivative_filter = derivative_filter
+        self.integral = 0.0
+        self.derivative = 0.0
+        self.prev_error = None
+
+    def update(self, setpoint, measured, dt):
+        """Compute the PWM duty for one control step."""
+        error = setpoint - measured
+        self.integral = min(max(self.integral + error * dt, -self.integral_limit), self.integral_limit)
+        if self.prev_error is not None:
+            # Low-pass the derivative so sensor noise does not saturate the output
+            derivative = (error - self.prev_error) / dt
+            self.derivative += (derivative - self.derivative) * dt / (self.derivative_filter + dt)
+        self.prev_error = error
+
+        output = self.bias + self.kp * error + self.ki * self.integral + self.kd * self.derivative
+        return 0 if math.isnan(output) else int(min(max(output, 0), 255))
@@ -0,0 +1,215 @@
+import json
+import os
+import pty
+import select
+import threading
+import time
+import tty
+import numpy as np
+import sercom.fastprotoc as pkt
+from sercom.fastprotoc import PacketType
+from sercom.parser import StreamParser
+from simulator.plant import MaglevPlant, PIDController
+
+
+def get_registry_dir():
+    """Get the directory running virtual devices register their ports in."""
+    return os.path.join(os.getcwd(), "tmp", "virtual_ports")
+
+
+def get_virtual_ports():
+    """Get the pty paths of all running virtual devices."""
+    directory = get_registry_dir()
+    if not os.path.isdir(directory):
+        return []
+
+    ports = []
+    for name in sorted(os.listdir(directory)):
+        try:
+            with open(os.path.join(directory, name), "r") as file:
+                entry = json.load(file)
+            os.kill(entry["pid"], 0)
+        except (OSError, ValueError, KeyError):
+            continue
+        if os.path.exists(entry["port"]):
+            ports.append(entry["port"])
+    return ports
+
+
+class VirtualLevitator(threading.Thread):
+    """Levitator firmware running against a simulated plant behind a pseudo-terminal.
+
+    The device answers SETPOINT/KP/KI/KD updates by echoing the accepted value and
+    streams HALL_UPDATE and PWM_UPDATE frames at `frame_rate` frames per second.
+    Frames that do not fit into the pty buffer are dropped like on a real UART.
+    """
+    def __init__(self, frame_rate=1000, noise=0.0, corruption=0.0, setpoint=300.0, kp=2.0, ki=5.0, kd=0.1, control_rate=1000, seed=None):
+        super().__init__(daemon=True, name="virtual-levitator")
+        self.frame_rate = frame_rate
+        self.noise = noise
+        self.corruption = corruption
+        self.setpoint = setpoint
+        self.plant = MaglevPlant()
+        self.controller = PIDController(kp, ki, kd)
+        self.control_period = 1 / control_rate
+        self.control_elapsed = 0.0
+        self.duty = self.controller.bias
+        self.rng = np.random.default_rng(seed)
+        self.parser = StreamParser()
+        self.stop_event = threading.Event()
+        self.master_fd, self.slave_fd = pty.openpty()
+        tty.setraw(self.slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+        self.registry_path = None
+        self.pending = b""
+        self.bytes_sent = 0
+        self.bytes_dropped = 0
+        self.frames_corrupted = 0
+        self.setters_received = 0
+
+    def frames_sent(self):
+        """Get the number of frames written to the pty."""
+        return self.bytes_sent // pkt.PACKET_SIZE
+
+    def frames_dropped(self):
+        """Get the number of frames dropped because the host did not keep up."""
+        return self.bytes_dropped // pkt.PACKET_SIZE
+
+    def set_frame_rate(self, frame_rate):
+        """Change the number of telemetry frames emitted per second."""
+        self.frame_rate = max(frame_rate, 2)
+
+    def register(self):
+        """Publish the port so sercom.get_available_ports lists it."""
+        directory = get_registry_dir()
+        os.makedirs(directory, exist_ok=True)
+        self.registry_path = os.path.join(directory, f"{os.getpid()}-{self.master_fd}.json")
+        with open(self.registry_path, "w") as file:
+            json.dump({"port": self.port, "pid": os.getpid()}, file)
+
+    def unregister(self):
+        """Remove the port from the registry."""
+        if self.registry_path is not None:
+            try:
+                os.remove(self.registry_path)
+            except OSError:
+                pass
+            self.registry_path = None
+
+    def stop(self):
+        """Stop the device and close the pty."""
+        self.stop_event.set()
+
+    def step(self, count, dt):
+        """Advance the plant by `count` telemetry samples, returns sensor readings and duties.
+
+        The control loop runs at its own fixed rate like on the firmware, so the
+        telemetry rate does not change the closed-loop behaviour.
+        """
+        readings = np.empty(count, dtype=np.float32)
+        duties = np.empty(count, dtype=np.float32)
+        noise = self.rng.normal(0.0, self.noise, count) if self.noise else np.zeros(count)
+        for i in range(count):
+            remaining = dt
+            while remaining > 0:
+                substep = min(remaining, self.control_period - self.control_elapsed)
+                self.plant.step(self.duty, substep)
+                self.control_elapsed += substep
+                remaining -= substep
+                if self.control_elapsed >= self.control_period * (1 - 1e-9):
+                    self.control_elapsed = 0.0
+                    self.duty = self.controller.update(self.setpoint, self.plant.sensor() + noise[i], self.control_period)
+            readings[i] = self.plant.sensor() + noise[i]
+            duties[i] = self.duty
+        return readings, duties
+
+    def encode(self, identifiers, values):
+        """Pack frames into bytes, corrupting a random fraction of them."""
+        frames = pkt.encode_many(identifiers, values)
+        raw = frames.view(np.uint8)
+        if self.corruption:
+            corrupted = np.flatnonzero(self.rng.random(len(frames)) < self.corruption)
+            positions = corrupted * pkt.PACKET_SIZE + self.rng.integers(0, pkt.PACKET_SIZE, len(corrupted))
+            raw[positions] = self.rng.integers(0, 256, len(corrupted), dtype=np.uint8)
+            self.frames_corrupted += len(corrupted)
+        return raw.tobytes()
+
+    def emit(self, readings, duties):
+        """Send interleaved HALL_UPDATE and PWM_UPDATE frames."""
+        identifiers = np.empty(2 * len(readings), dtype=np.uint8)
+        identifiers[0::2] = PacketType.HALL_UPDATE.value
+        identifiers[1::2] = PacketType.PWM_UPDATE.value
+        values = np.empty(2 * len(readings), dtype=np.float32)
+        values[0::2] = readings
+        values[1::2] = duties
+        self.write(self.encode(identifiers, values))
+
+    def write(self, data):
+        """Write without blocking, frames that do not fit are dropped like on a UART overrun."""
+        pending = self.pending
+        data = pending + data
+        try:
+            written = os.write(self.master_fd, data)
+        except OSError:
+            # Buffer full or no reader attached to the slave side
+            written = 0
+
+        # A frame cut in half has to be finished first or the host loses sync, frames start after the pending tail
+        cut = (len(pending) - written) % pkt.PACKET_SIZE
+        self.pending = data[written:written + cut]
+        self.bytes_sent += written
+        self.bytes_dropped += len(data) - written - cut
+        return written
+
+    def receive(self):
+        """Apply parameter updates sent by the host and echo them back."""
+        try:
+            data = os.read(self.master_fd, self.parser.free())
+        except (BlockingIOError, OSError):
+            return
+        self.parser.feed(data)
+        result = self.parser.parse()
+
+        for identifier, value in zip(result.identifiers.tolist(), result.values.tolist()):
+            if identifier == PacketType.SETPOINT_UPDATE.value:
+                self.setpoint = value
+            elif identifier == PacketType.KP_UPDATE.value:
+                self.controller.kp = value
+            elif identifier == PacketType.KI_UPDATE.value:
+                self.controller.ki = value
+            elif identifier == PacketType.KD_UPDATE.value:
+                self.controller.kd = value
+            else:
+                continue
+            self.setters_received += 1
+            self.write(self.encode(np.array([identifier], dtype=np.uint8), np.array([value], dtype=np.float32)))
+
+    def run(self):
+        started = time.monotonic()
+        emitted = 0
+        rate = self.frame_rate
+        try:
+            while not self.stop_event.is_set():
+                if rate != self.frame_rate:
+                    started, emitted, rate = time.monotonic(), 0, self.frame_rate
+                sample_rate = rate / 2
+                max_batch = max(int(sample_rate * 0.05), 1)
+
+                # Catch up on every sample that is due, a stall skips samples instead of sending a burst
+                due = int((time.monotonic() - started) * sample_rate) - emitted
+                if due > max_batch:
+                    emitted += due - max_batch
+                    due = max_batch
+                if due > 0:
+                    self.emit(*self.step(due, 1 / sample_rate))
+                    emitted += due
+
+                timeout = max((started + (emitted + 1) / sample_rate) - time.monotonic(), 0)
+                readable, _, _ = select.select([self.master_fd], [], [], min(timeout, 0.05))
+                if readable:
+                    self.receive()
+        finally:
+            self.unregister()
+            os.close(self.master_fd)
+            os.close(self.slave_fd)